@@ -0,0 +1,111 @@
+import random
+from datetime import date, timedelta
+
+# A handful of real Weatherbit codes so the descriptions look like the real thing
+WEATHER_TYPES = [
+    (800, 'c01d', 'Clear sky'),
+    (801, 'c02d', 'Few clouds'),
+    (803, 'c03d', 'Broken clouds'),
+    (804, 'c04d', 'Overcast clouds'),
+    (500, 'r01d', 'Light rain'),
+    (502, 'r03d', 'Heavy rain'),
+    (600, 's01d', 'Light snow'),
+    (200, 't01d', 'Thunderstorm with light rain'),
+]
+
+WIND_DIRECTIONS = [
+    ('N', 'north'), ('NE', 'northeast'), ('E', 'east'), ('SE', 'southeast'),
+    ('S', 'south'), ('SW', 'southwest'), ('W', 'west'), ('NW', 'northwest'),
+]
+
+def generate_cities(n, seed=0):
+    """
+    Generate n synthetic cities shaped like config.yaml entries
+    Longitudes step by 0.0001 degrees so every city has unique coordinates
+    and maps to its own row in the cities table
+    """
+    rng = random.Random(seed)
+    cities = []
+    for i in range(n):
+        cities.append({
+            'name': f"Bench City {i}",
+            'lat': round(rng.uniform(-60, 70), 4),
+            'lon': round(-179.9999 + i * 0.0001, 4),
+        })
+    return cities
+
+def generate_day(day, rng):
+    """Generate one forecast day in the Weatherbit /forecast/daily format (all values pass validation)"""
+    min_temp = round(rng.uniform(-20, 25), 1)
+    max_temp = round(min_temp + rng.uniform(0, 15), 1)
+    wind_spd = round(rng.uniform(0, 15), 1)
+    precip = rng.choice([0, 0, round(rng.uniform(0, 30), 2)])
+    code, icon, description = rng.choice(WEATHER_TYPES)
+    cdir, cdir_full = rng.choice(WIND_DIRECTIONS)
+    ts = int((day - date(1970, 1, 1)).total_seconds())
+
+    return {
+        'valid_date': day.isoformat(),
+        'datetime': day.isoformat(),
+        'ts': ts,
+        'temp': round((min_temp + max_temp) / 2, 1),
+        'max_temp': max_temp,
+        'min_temp': min_temp,
+        'app_max_temp': round(max_temp - rng.uniform(0, 3), 1),
+        'app_min_temp': round(min_temp - rng.uniform(0, 3), 1),
+        'high_temp': max_temp,
+        'low_temp': min_temp,
+        'dewpt': round(min_temp - rng.uniform(0, 5), 1),
+        'precip': precip,
+        'pop': rng.randint(0, 100),
+        'snow': 0,
+        'snow_depth': 0,
+        'wind_spd': wind_spd,
+        'wind_gust_spd': round(wind_spd + rng.uniform(0, 10), 1),
+        'wind_dir': rng.randint(0, 360),
+        'wind_cdir': cdir,
+        'wind_cdir_full': cdir_full,
+        'clouds': rng.randint(0, 100),
+        'clouds_hi': rng.randint(0, 100),
+        'clouds_low': rng.randint(0, 100),
+        'clouds_mid': rng.randint(0, 100),
+        'vis': round(rng.uniform(1, 24), 1),
+        'rh': rng.randint(20, 100),
+        'pres': round(rng.uniform(980, 1040), 1),
+        'slp': round(rng.uniform(990, 1045), 1),
+        'ozone': round(rng.uniform(250, 400), 1),
+        'uv': round(rng.uniform(0, 11), 1),
+        'weather': {'code': code, 'icon': icon, 'description': description},
+        'moon_phase': round(rng.uniform(0, 1), 2),
+        'moon_phase_lunation': round(rng.uniform(0, 1), 2),
+        'sunrise_ts': ts + 6 * 3600,
+        'sunset_ts': ts + 18 * 3600,
+        'moonrise_ts': ts + 20 * 3600,
+        'moonset_ts': ts + 8 * 3600,
+        'max_dhi': round(rng.uniform(0, 200), 2),
+    }
+
+def generate_payload(city, days, start=None, seed=0):
+    """
+    Generate a full API response for one city
+    The same city, start date and seed always produce the same payload
+    """
+    rng = random.Random(f"{city['lat']},{city['lon']},{seed}")
+    start = start or date.today()
+
+    return {
+        'city_name': city.get('name', 'Bench City'),
+        'country_code': 'XX',
+        'state_code': '00',
+        'lat': city['lat'],
+        'lon': city['lon'],
+        'timezone': 'UTC',
+        'data': [generate_day(start + timedelta(days=i), rng) for i in range(days)],
+    }
+
+def generate_records(n_cities, days, seed=0):
+    """Yield (city, day_data) pairs for n_cities x days without going through the API format wrapper"""
+    for city in generate_cities(n_cities, seed):
+        payload = generate_payload(city, days, seed=seed)
+        for day_data in payload['data']:
+            yield city, day_data
@@ -0,0 +1,104 @@
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from data_generator import generate_payload
+
+class FakeWeatherbitHandler(BaseHTTPRequestHandler):
+    """Serves synthetic /forecast/daily and /history/daily responses in the Weatherbit format"""
+
+    def do_GET(self):
+        settings = self.server.settings
+        parsed = urlparse(self.path)
+
+        if settings['latency']:
+            time.sleep(settings['latency'])
+
+        if parsed.path not in ('/forecast/daily', '/history/daily'):
+            self._send(404, {'error': 'Not found'})
+            return
+
+        if settings['rng'].random() < settings['error_rate']:
+            self._send(500, {'error': 'Injected failure'})
+            return
+
+        query = parse_qs(parsed.query)
+        try:
+            lat = float(query['lat'][0])
+            lon = float(query['lon'][0])
+        except (KeyError, ValueError):
+            self._send(400, {'error': 'lat and lon are required'})
+            return
+
+        city = {'name': f"Bench {lat},{lon}", 'lat': lat, 'lon': lon}
+
+        if parsed.path == '/history/daily':
+            # end_date is exclusive, as in the real API
+            try:
+                start = date.fromisoformat(query['start_date'][0])
+                end = date.fromisoformat(query['end_date'][0])
+            except (KeyError, ValueError):
+                self._send(400, {'error': 'start_date and end_date are required'})
+                return
+            self._send(200, generate_payload(city, (end - start).days, start=start, seed=settings['seed']))
+            return
+
+        self._send(200, generate_payload(city, settings['days'], seed=settings['seed']))
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+def start_server(days=16, latency=0.0, error_rate=0.0, seed=0, port=0):
+    """
+    Start the fake API on a background thread
+    port=0 picks a free port. Returns the server; its base URL is server.url
+    Call server.shutdown() when finished.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeWeatherbitHandler)
+    server.daemon_threads = True
+    server.settings = {
+        'days': days,
+        'latency': latency,
+        'error_rate': error_rate,
+        'seed': seed,
+        'rng': random.Random(seed),
+    }
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def main():
+    """Run the fake API standalone, e.g. for manual runs with WEATHER_API_URL set"""
+    parser = argparse.ArgumentParser(description="Fake Weatherbit API for benchmarks")
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--days', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_server(args.days, args.latency, args.error_rate, args.seed, args.port)
+    print(f"Fake Weatherbit API listening on {server.url} (export WEATHER_API_URL={server.url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
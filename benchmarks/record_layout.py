@@ -0,0 +1,123 @@
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from data_generator import generate_records
+from load_database import transform_weather_record
+from records import DAILY_WEATHER_COLUMNS
+
+# Source days are reused round-robin so generating the input doesn't dominate memory
+SOURCE_POOL = 1000
+
+def legacy_transform(day_data):
+    """The previous transform: one 41-key dict per day, keyed by column name"""
+    weather = day_data.get('weather', {})
+    max_temp = day_data.get('max_temp')
+    min_temp = day_data.get('min_temp')
+    temp_range = max_temp - min_temp if (max_temp and min_temp) else None
+    precip = day_data.get('precip', 0)
+    if precip == 0:
+        precip_category = 'None'
+    elif precip < 2.5:
+        precip_category = 'Light'
+    elif precip < 10:
+        precip_category = 'Moderate'
+    else:
+        precip_category = 'Heavy'
+
+    return {
+        'forecast_date': day_data.get('datetime'),
+        'temp': day_data.get('temp'),
+        'max_temp': day_data.get('max_temp'),
+        'min_temp': day_data.get('min_temp'),
+        'apparent_max_temp': day_data.get('app_max_temp'),
+        'apparent_min_temp': day_data.get('app_min_temp'),
+        'high_temp': day_data.get('high_temp'),
+        'low_temp': day_data.get('low_temp'),
+        'dewpt': day_data.get('dewpt'),
+        'precipitation': day_data.get('precip'),
+        'pop': day_data.get('pop'),
+        'snow': day_data.get('snow'),
+        'snow_depth': day_data.get('snow_depth'),
+        'wind_speed': day_data.get('wind_spd'),
+        'wind_gust_spd': day_data.get('wind_gust_spd'),
+        'wind_dir': day_data.get('wind_dir'),
+        'wind_cdir': day_data.get('wind_cdir'),
+        'wind_cdir_full': day_data.get('wind_cdir_full'),
+        'clouds': day_data.get('clouds'),
+        'clouds_hi': day_data.get('clouds_hi'),
+        'clouds_low': day_data.get('clouds_low'),
+        'clouds_mid': day_data.get('clouds_mid'),
+        'vis': day_data.get('vis'),
+        'humidity': day_data.get('rh'),
+        'pressure': day_data.get('pres'),
+        'slp': day_data.get('slp'),
+        'ozone': day_data.get('ozone'),
+        'uv': day_data.get('uv'),
+        'weather_code': weather.get('code'),
+        'weather_description': weather.get('description'),
+        'weather_icon': weather.get('icon'),
+        'moon_phase': day_data.get('moon_phase'),
+        'moon_phase_lunation': day_data.get('moon_phase_lunation'),
+        'sunrise_ts': day_data.get('sunrise_ts'),
+        'sunset_ts': day_data.get('sunset_ts'),
+        'moonrise_ts': day_data.get('moonrise_ts'),
+        'moonset_ts': day_data.get('moonset_ts'),
+        'max_dhi': day_data.get('max_dhi'),
+        'temp_range': temp_range,
+        'precip_category': precip_category,
+        'ts': day_data.get('ts')
+    }
+
+def legacy_params(city_id, record):
+    """The previous insert: index the dict once per column to build the parameter tuple"""
+    return (city_id,) + tuple(record[column] for column in DAILY_WEATHER_COLUMNS[1:])
+
+def measure_memory(build, sources, n):
+    """Bytes held by a list of n records built with build()"""
+    gc.collect()
+    tracemalloc.start()
+    records = [build(sources[i % len(sources)]) for i in range(n)]
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return held
+
+def measure_throughput(to_params, sources, n):
+    """Records per second from API dict to parameter tuple"""
+    start = time.perf_counter()
+    for i in range(n):
+        to_params(sources[i % len(sources)])
+    return n / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dict and WeatherRecord record layouts")
+    parser.add_argument('--records', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    sources = [day_data for _, day_data in generate_records(SOURCE_POOL // 16 + 1, 16)][:SOURCE_POOL]
+    n = args.records
+    city_id = 1
+
+    dict_bytes = measure_memory(legacy_transform, sources, n)
+    tuple_bytes = measure_memory(lambda day: transform_weather_record(day, city_id), sources, n)
+
+    dict_rate = measure_throughput(lambda day: legacy_params(city_id, legacy_transform(day)), sources, n)
+    tuple_rate = measure_throughput(lambda day: transform_weather_record(day, city_id), sources, n)
+
+    mib = 1024 * 1024
+    print(f"{n:,} records")
+    print(f"  dict:          {dict_bytes / mib:8.1f} MiB  ({dict_bytes / n:.0f} B/record)  {dict_rate:,.0f} records/s to params")
+    print(f"  WeatherRecord: {tuple_bytes / mib:8.1f} MiB  ({tuple_bytes / n:.0f} B/record)  {tuple_rate:,.0f} records/s to params")
+    print(f"  memory saved: {1 - tuple_bytes / dict_bytes:.0%}, throughput: {tuple_rate / dict_rate:.2f}x")
+
+if __name__ == "__main__":
+    main()
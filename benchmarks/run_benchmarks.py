@@ -0,0 +1,319 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+import yaml
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from data_generator import generate_cities, generate_records
+from fake_api import start_server
+
+RESULTS_DIR = os.path.join('logs', 'benchmarks')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+SCENARIOS = ['validate_transform', 'extract', 'db_load', 'end_to_end']
+
+class ScenarioSkipped(Exception):
+    """Raised when a scenario can't run here (missing dependency or no database)"""
+
+class ScenarioFailed(Exception):
+    """Raised when a scenario ran but did no work (e.g. the pipeline loaded nothing), so its timing means nothing"""
+
+def _import_pipeline():
+    """Import load_database, skipping the scenario if its dependencies aren't installed"""
+    try:
+        import load_database
+    except ImportError as e:
+        raise ScenarioSkipped(f"pipeline dependencies not installed: {e}")
+    return load_database
+
+def _connect(load_database):
+    try:
+        return load_database.get_db_connection()
+    except ImportError as e:
+        raise ScenarioSkipped(f"database driver not installed: {e}")
+    except Exception as e:
+        raise ScenarioSkipped(f"database not reachable: {e}")
+
+def _result(seconds, count, unit):
+    return {
+        'seconds': seconds,
+        unit: count,
+        f'{unit}_per_second': count / seconds if seconds else 0.0,
+    }
+
+def bench_validate_transform(params):
+    """Validation and transform only - no network, no database"""
+    from validate_data import validate_weather_record
+    transform_weather_record = _import_pipeline().transform_weather_record
+
+    records = [day_data for _, day_data in generate_records(params['cities'], params['days'], params['seed'])]
+
+    start = time.perf_counter()
+    for day_data in records:
+        validate_weather_record(day_data)
+    validate_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for day_data in records:
+        transform_weather_record(day_data)
+    transform_seconds = time.perf_counter() - start
+
+    result = _result(validate_seconds + transform_seconds, len(records), 'records')
+    result['validate_seconds'] = validate_seconds
+    result['transform_seconds'] = transform_seconds
+    return result
+
+def bench_extract(params):
+    """HTTP fetch for every city against the fake API"""
+    from extract import fetch_weather_data
+    try:
+        import requests  # fetch_weather_data imports it lazily, so check it is installed up front
+    except ImportError as e:
+        raise ScenarioSkipped(f"extract dependencies not installed: {e}")
+
+    failures = 0
+    start = time.perf_counter()
+    for city in params['city_list']:
+        if fetch_weather_data(city['lat'], city['lon']) is None:
+            failures += 1
+    seconds = time.perf_counter() - start
+
+    result = _result(seconds, len(params['city_list']), 'requests')
+    result['failures'] = failures
+    return result
+
+def bench_db_load(params):
+    """Upserts only - records are transformed up front and the transaction is rolled back afterwards"""
+    load_database = _import_pipeline()
+    conn = _connect(load_database)
+    cursor = conn.cursor()
+
+    rows = 0
+    try:
+        # Cities and transformed records are prepared outside the timed section
+        city_ids = {}
+        for city in params['city_list']:
+            payload = {'city_name': city['name'], 'lat': city['lat'], 'lon': city['lon']}
+            city_ids[city['name']] = load_database.insert_or_get_city(cursor, city, payload)
+        records = [
+            load_database.transform_weather_record(day_data, city_ids[city['name']])
+            for city, day_data in generate_records(params['cities'], params['days'], params['seed'])
+        ]
+
+        start = time.perf_counter()
+        for record in records:
+            load_database.insert_weather_record(cursor, record)
+            rows += 1
+        seconds = time.perf_counter() - start
+    finally:
+        conn.rollback()  # Leave no benchmark rows behind
+        cursor.close()
+        conn.close()
+
+    return _result(seconds, rows, 'rows')
+
+def _delete_bench_cities(conn):
+    """Remove the benchmark cities (their daily_weather rows cascade)"""
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM cities WHERE name LIKE 'Bench %'")
+    conn.commit()
+
+def bench_end_to_end(params):
+    """load_database.main() against the fake API and the local Postgres"""
+    load_database = _import_pipeline()
+    conn = _connect(load_database)
+
+    try:
+        # Start from no benchmark rows so the count below is only this run's
+        _delete_bench_cities(conn)
+
+        start = time.perf_counter()
+        load_database.main()
+        seconds = time.perf_counter() - start
+
+        # Count the rows actually written - failed fetches (--error-rate) and skipped records load nothing
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT count(*) FROM daily_weather
+                JOIN cities USING (city_id)
+                WHERE cities.name LIKE 'Bench %'
+            """)
+            rows = cursor.fetchone()[0]
+        conn.commit()
+
+        # main() logs and swallows its errors, so a missing schema or DB error shows up only as nothing loaded
+        if rows == 0:
+            raise ScenarioFailed("no rows were loaded - see logs/pipeline.log")
+    finally:
+        # main() commits, so clean up after it
+        _delete_bench_cities(conn)
+        conn.close()
+
+    result = _result(seconds, rows, 'records')
+    result['expected_records'] = params['cities'] * params['days']
+    return result
+
+BENCHMARKS = {
+    'validate_transform': bench_validate_transform,
+    'extract': bench_extract,
+    'db_load': bench_db_load,
+    'end_to_end': bench_end_to_end,
+}
+
+def run_scenario(name, params, repeat):
+    """Run a scenario `repeat` times and keep the fastest run"""
+    runs = []
+    try:
+        for _ in range(repeat):
+            runs.append(BENCHMARKS[name](params))
+    except ScenarioSkipped as e:
+        print(f"  {name}: skipped ({e})")
+        return {'skipped': str(e)}
+    except ScenarioFailed as e:
+        print(f"  {name}: FAILED ({e})")
+        return {'failed': str(e)}
+
+    best = min(runs, key=lambda run: run['seconds'])
+    best['runs'] = [run['seconds'] for run in runs]
+    print(f"  {name}: {best['seconds']:.4f}s (best of {repeat})")
+    return best
+
+def throughput(result):
+    """The scenario's (name, value) work-per-second figure, e.g. ('rows_per_second', 1450.0), or None"""
+    for key, value in result.items():
+        if key.endswith('_per_second'):
+            return key, value
+    return None
+
+def compare(results, baseline, threshold):
+    """
+    Compare scenario throughput against a stored baseline
+    Throughput (work done per second) rather than raw seconds, so runs that did different amounts of work
+    (e.g. fewer rows loaded at a higher --error-rate) are still comparable. A failed scenario is a regression.
+    Returns the names of scenarios that failed or lost more than threshold (a fraction, e.g. 0.1) of their throughput
+    """
+    regressions = []
+    print(f"\nComparison against baseline from {baseline.get('timestamp', 'unknown')}:")
+
+    for name, current in results['scenarios'].items():
+        if 'failed' in current:
+            print(f"  {name}: REGRESSION (failed: {current['failed']})")
+            regressions.append(name)
+            continue
+
+        previous = baseline.get('scenarios', {}).get(name)
+        current_rate = throughput(current)
+        previous_rate = throughput(previous) if previous else None
+        if not current_rate or not previous_rate or current_rate[0] != previous_rate[0] or not previous_rate[1]:
+            print(f"  {name}: no comparison")
+            continue
+
+        unit, previous_value = previous_rate
+        current_value = current_rate[1]
+        change = (current_value - previous_value) / previous_value
+        status = 'ok'
+        if change < -threshold:
+            status = 'REGRESSION'
+            regressions.append(name)
+        elif change > threshold:
+            status = 'faster'
+        print(f"  {name}: {previous_value:.1f} -> {current_value:.1f} {unit} ({change:+.1%}) {status}")
+
+    if results['params'] != baseline.get('params'):
+        print("  Note: parameters differ from the baseline run, so the comparison is approximate")
+
+    return regressions
+
+def write_config(cities):
+    """Write a temporary config.yaml listing the benchmark cities, for load_database.main()"""
+    with open(os.path.join(REPO_DIR, 'config', 'config.yaml')) as f:
+        config = yaml.safe_load(f)
+    config['cities'] = cities
+
+    handle, path = tempfile.mkstemp(suffix='.yaml', prefix='bench_config_')
+    with os.fdopen(handle, 'w') as f:
+        yaml.safe_dump(config, f)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Weather ETL benchmark suite")
+    parser.add_argument('--cities', type=int, default=50, help="number of synthetic cities (N)")
+    parser.add_argument('--days', type=int, default=16, help="forecast days per city (D)")
+    parser.add_argument('--latency', type=float, default=0.0, help="fake API latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of fake API requests that fail")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="runs per scenario, the fastest is kept")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--output', help="results file (default logs/benchmarks/bench_<timestamp>.json)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline results to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.10, help="throughput drop (fraction) that counts as a regression")
+    args = parser.parse_args()
+
+    # The pipeline reads config/ and writes logs/ relative to the repo root
+    os.chdir(REPO_DIR)
+
+    params = {
+        'cities': args.cities,
+        'days': args.days,
+        'latency': args.latency,
+        'error_rate': args.error_rate,
+        'seed': args.seed,
+    }
+
+    server = start_server(args.days, args.latency, args.error_rate, args.seed)
+    config_path = write_config(generate_cities(args.cities, args.seed))
+    os.environ['WEATHER_API_URL'] = server.url
+    os.environ['CONFIG_PATH'] = config_path
+
+    print(f"Running benchmarks: {args.cities} cities x {args.days} days, fake API at {server.url}")
+    try:
+        scenarios = {}
+        run_params = dict(params, city_list=generate_cities(args.cities, args.seed))
+        for name in args.scenarios:
+            scenarios[name] = run_scenario(name, run_params, args.repeat)
+    finally:
+        server.shutdown()
+        os.remove(config_path)
+
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': params,
+        'scenarios': scenarios,
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    # Failed scenarios fail the run even without a baseline to compare against
+    regressions = [name for name, result in scenarios.items() if 'failed' in result]
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    if regressions:
+        print(f"\nRegressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
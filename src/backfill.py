@@ -0,0 +1,229 @@
+import argparse
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import date, timedelta
+import bootstrap
+import metrics
+from extract import fetch_history_data, load_config
+from load_database import get_db_connection, get_upsert_mode, load_weather_response
+
+logger = logging.getLogger(__name__)
+
+# Defaults used when config.yaml has no 'backfill' section
+DEFAULT_CHUNK_DAYS = 30
+DEFAULT_WORKERS = 4
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+
+class RateLimiter:
+    """
+    Spaces out calls so that no more than `rate` start per second, shared across threads
+    A rate of 0 or None disables the limit
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def split_chunks(start, end, chunk_days):
+    """
+    Split the inclusive date range start..end into [chunk_start, chunk_end) pieces of at most chunk_days
+    Chunks are counted from start, so re-running with the same range gives the same chunks
+    """
+    chunks = []
+    chunk_start = start
+    stop = end + timedelta(days=1)
+    while chunk_start < stop:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days), stop)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+    return chunks
+
+def plan_chunks(cities, start, end, chunk_days, completed):
+    """
+    Build the (city, chunk_start, chunk_end) jobs for every city, leaving out chunks already completed
+    completed is a set of (lat, lon, chunk_start, chunk_end)
+    """
+    jobs = []
+    for city in cities:
+        for chunk_start, chunk_end in split_chunks(start, end, chunk_days):
+            key = (round(float(city['lat']), 7), round(float(city['lon']), 7), chunk_start, chunk_end)
+            if key not in completed:
+                jobs.append((city, chunk_start, chunk_end))
+    return jobs
+
+def load_completed_chunks(cursor, start, end):
+    """Read the chunks recorded as done for any city within start..end"""
+    cursor.execute("""
+        SELECT latitude, longitude, chunk_start, chunk_end
+        FROM backfill_progress
+        WHERE chunk_start >= %s AND chunk_end <= %s
+    """, (start, end + timedelta(days=1)))
+    return {
+        (round(float(lat), 7), round(float(lon), 7), chunk_start, chunk_end)
+        for lat, lon, chunk_start, chunk_end in cursor.fetchall()
+    }
+
+def mark_chunk_done(cursor, city, chunk_start, chunk_end, rows_loaded):
+    """Record a finished chunk - committed together with its weather rows"""
+    cursor.execute("""
+        INSERT INTO backfill_progress (latitude, longitude, chunk_start, chunk_end, rows_loaded)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (latitude, longitude, chunk_start, chunk_end) DO UPDATE SET
+            rows_loaded = EXCLUDED.rows_loaded,
+            completed_at = CURRENT_TIMESTAMP
+    """, (city['lat'], city['lon'], chunk_start, chunk_end, rows_loaded))
+
+def chunk_is_complete(api_response, chunk_start, chunk_end):
+    """True if the response has a day for every date in [chunk_start, chunk_end)"""
+    dates = {day.get('datetime') for day in api_response.get('data', []) if day.get('datetime')}
+    return len(dates) >= (chunk_end - chunk_start).days
+
+def _fetch_chunk(rate_limiter, city, chunk_start, chunk_end):
+    rate_limiter.wait()
+    return fetch_history_data(city['lat'], city['lon'], chunk_start.isoformat(), chunk_end.isoformat())
+
+def run_backfill(cities, start, end, chunk_days, workers, requests_per_second, upsert_mode):
+    """
+    Backfill daily_weather for cities over start..end (inclusive)
+    Chunks are fetched concurrently on a thread pool under the rate limit; each fetched chunk is loaded
+    on this thread and committed along with its progress row, so an interrupted run resumes after
+    the last committed chunk.
+    Returns a Counter of chunk and row outcomes
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    summary = Counter()
+
+    try:
+        completed = load_completed_chunks(cursor, start, end)
+        conn.commit()
+        jobs = plan_chunks(cities, start, end, chunk_days, completed)
+        summary['chunks_skipped'] = len(split_chunks(start, end, chunk_days)) * len(cities) - len(jobs)
+        logger.info("Backfill %s to %s: %d chunks to fetch, %d already done",
+                    start, end, len(jobs), summary['chunks_skipped'])
+
+        rate_limiter = RateLimiter(requests_per_second)
+        pending_jobs = iter(jobs)
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            def submit_next():
+                job = next(pending_jobs, None)
+                if job:
+                    in_flight[executor.submit(_fetch_chunk, rate_limiter, *job)] = job
+
+            # Keep a bounded number of chunks in flight so responses don't pile up in memory
+            for _ in range(workers * 2):
+                submit_next()
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    city, chunk_start, chunk_end = in_flight.pop(future)
+                    submit_next()
+
+                    # Anything the fetch thread raised (not only request errors) fails just this chunk
+                    try:
+                        api_response = future.result()
+                    except Exception as e:
+                        api_response = None
+                        logger.error("Error fetching %s %s to %s: %s", city['name'], chunk_start, chunk_end, e)
+                    if not api_response:
+                        summary['chunks_failed'] += 1
+                        logger.error("Failed to fetch %s %s to %s", city['name'], chunk_start, chunk_end)
+                        continue
+
+                    try:
+                        rows_loaded = load_weather_response(cursor, city, api_response, summary, upsert_mode)
+                        complete = chunk_is_complete(api_response, chunk_start, chunk_end)
+                        # A chunk missing days is loaded but not recorded, so a later run fetches it again
+                        if complete:
+                            mark_chunk_done(cursor, city, chunk_start, chunk_end, rows_loaded)
+                        conn.commit()
+                    except Exception as e:
+                        conn.rollback()
+                        summary['chunks_failed'] += 1
+                        logger.error("Error loading %s %s to %s: %s", city['name'], chunk_start, chunk_end, e)
+                        continue
+
+                    if not complete:
+                        summary['chunks_incomplete'] += 1
+                        logger.warning("Incomplete history for %s %s to %s - not marked done, will be fetched again",
+                                       city['name'], chunk_start, chunk_end)
+                        continue
+
+                    summary['chunks_done'] += 1
+                    logger.info("Backfilled %s %s to %s (%d/%d chunks)", city['name'], chunk_start, chunk_end,
+                                summary['chunks_done'] + summary['chunks_incomplete'] + summary['chunks_failed'],
+                                len(jobs))
+
+        logger.info("Backfill finished: %d chunks done, %d incomplete, %d failed, %d skipped; "
+                    "rows %d inserted, %d updated, %d unchanged",
+                    summary['chunks_done'], summary['chunks_incomplete'], summary['chunks_failed'],
+                    summary['chunks_skipped'],
+                    summary['inserted'], summary['updated'], summary['unchanged'])
+        return summary
+
+    finally:
+        cursor.close()
+        conn.close()
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}' (expected YYYY-MM-DD)")
+
+def main(argv=None):
+    """Backfill historical daily weather for the configured cities"""
+    config = load_config()
+    settings = config.get('backfill', {})
+
+    parser = argparse.ArgumentParser(description="Backfill historical weather into daily_weather")
+    parser.add_argument('--start', type=parse_date, required=True, help="first day, YYYY-MM-DD")
+    parser.add_argument('--end', type=parse_date, required=True, help="last day (inclusive), YYYY-MM-DD")
+    parser.add_argument('--cities', nargs='+', help="city names from config.yaml (default: all)")
+    parser.add_argument('--chunk-days', type=int,
+                        default=settings.get('chunk_days', DEFAULT_CHUNK_DAYS))
+    parser.add_argument('--workers', type=int,
+                        default=settings.get('workers', DEFAULT_WORKERS))
+    parser.add_argument('--requests-per-second', type=float,
+                        default=settings.get('requests_per_second', DEFAULT_REQUESTS_PER_SECOND))
+    args = parser.parse_args(argv)
+
+    if args.end < args.start:
+        parser.error("--end is before --start")
+    # Today's history is still incomplete and later days have none; a chunk covering them would never fill in
+    if args.end >= date.today():
+        parser.error("--end must be before today")
+
+    cities = config['cities']
+    if args.cities:
+        cities = [city for city in cities if city['name'] in args.cities]
+        missing = set(args.cities) - {city['name'] for city in cities}
+        if missing:
+            parser.error(f"unknown cities: {', '.join(sorted(missing))}")
+
+    metrics.start(config.get('metrics', {}))
+    try:
+        run_backfill(cities, args.start, args.end, args.chunk_days, args.workers,
+                     args.requests_per_second, get_upsert_mode(config))
+    finally:
+        metrics.finish(config.get('metrics', {}))
+
+if __name__ == "__main__":
+    bootstrap.initialise('backfill.log')
+    main()
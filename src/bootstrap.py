@@ -0,0 +1,30 @@
+import time
+
+# Taken when this module is first imported - the CLI imports it first so startup time covers all other imports
+PROCESS_START = time.perf_counter()
+
+_initialised = False
+
+def initialise(log_file=None):
+    """
+    One-time process setup: load .env, then configure logging with the options from config.yaml
+    Only the first call does anything, so entry points can call it freely.
+    log_file=None loads .env only (extract reports to the console with print)
+    """
+    global _initialised
+    if _initialised:
+        return
+    _initialised = True
+
+    # Imported here so that importing pipeline modules never pays for (or triggers) this setup
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    if log_file:
+        from extract import load_config
+        from logger_config import setup_logging
+        setup_logging(log_file, **load_config().get('logging', {}))
+
+def startup_seconds():
+    """Seconds since this module was imported"""
+    return time.perf_counter() - PROCESS_START
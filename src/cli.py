@@ -0,0 +1,102 @@
+import bootstrap  # First import - starts the startup clock
+import argparse
+import logging
+import sys
+
+# Each command imports its pipeline module only when chosen, so e.g. `setup` never loads requests
+
+def cmd_setup(args):
+    bootstrap.initialise('setup.log')
+    from setup_database import create_tables
+    return create_tables
+
+def cmd_extract(args):
+    bootstrap.initialise()
+    import extract
+    return extract.main
+
+def cmd_load(args):
+    bootstrap.initialise('pipeline.log')
+    import load_database
+    return load_database.main
+
+def cmd_distributed(args):
+    bootstrap.initialise('pipeline.log')
+    import distributed
+    return lambda: distributed.main(args.passthrough_args)
+
+def cmd_backfill(args):
+    bootstrap.initialise('backfill.log')
+    import backfill
+    return lambda: backfill.main(args.passthrough_args)
+
+def cmd_export(args):
+    bootstrap.initialise('export.log')
+    import export
+    return lambda: export.main(args.passthrough_args)
+
+# Commands whose remaining options are handed to the module's own argument parser
+PASSTHROUGH_COMMANDS = ('distributed', 'backfill', 'export')
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='weather-etl', description="Weather ETL pipeline")
+    parser.add_argument('--startup-time', action='store_true',
+                        help="print how long imports and initialisation took before the command started "
+                             "(must come before the command)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    setup = subparsers.add_parser('setup', help="create the database tables")
+    setup.set_defaults(handler=cmd_setup)
+
+    extract = subparsers.add_parser('extract', help="fetch raw API responses into logs/")
+    extract.add_argument('--profile', action='store_true',
+                         help="profile the run and save a report under logs/profiles/")
+    extract.set_defaults(handler=cmd_extract)
+
+    load = subparsers.add_parser('load', help="run the full extract-transform-load pipeline")
+    load.add_argument('--profile', action='store_true',
+                      help="profile the run and save a report under logs/profiles/")
+    load.set_defaults(handler=cmd_load)
+
+    # Any further options for these are passed through to the module (see parse_args).
+    # add_help=False so `cli.py distributed --help` reaches the module's own parser.
+    distributed = subparsers.add_parser('distributed', add_help=False,
+                                        help="run a distributed worker (cli.py distributed --help for options)")
+    distributed.set_defaults(handler=cmd_distributed)
+
+    backfill = subparsers.add_parser('backfill', add_help=False,
+                                     help="load historical weather for a date range (cli.py backfill --help for options)")
+    backfill.set_defaults(handler=cmd_backfill)
+
+    export = subparsers.add_parser('export', add_help=False,
+                                   help="write new/changed rows to Parquet (cli.py export --help for options)")
+    export.set_defaults(handler=cmd_export)
+
+    return parser
+
+def parse_args(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command not in PASSTHROUGH_COMMANDS:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.passthrough_args = extra
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    run = args.handler(args)
+
+    startup_ms = bootstrap.startup_seconds() * 1000
+    logging.getLogger(__name__).info(f"Startup took {startup_ms:.1f} ms")
+    if args.startup_time:
+        print(f"Startup: {startup_ms:.1f} ms", file=sys.stderr)
+
+    if getattr(args, 'profile', False):
+        import profiling
+        report_path = profiling.profile_run(args.command, run)
+        print(f"Saved profile report to {report_path}")
+    else:
+        run()
+
+if __name__ == "__main__":
+    main()
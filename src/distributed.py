@@ -0,0 +1,284 @@
+import argparse
+import logging
+import os
+import socket
+import bootstrap
+import metrics
+from extract import load_config
+from collections import Counter
+from load_database import get_db_connection, get_upsert_mode, process_city
+from logger_config import setup_logging, shutdown_logging
+
+logger = logging.getLogger(__name__)
+
+# Defaults used when config.yaml has no 'distributed' section
+DEFAULT_BATCH_SIZE = 5
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+def get_worker_id():
+    """Identify this process as host-pid so leases can be traced back to a worker"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def get_worker_slot(slot):
+    """
+    Stable host-slot name for a worker's metrics file and label
+    Unlike the pid it is the same on every run, so a rerun replaces the previous run's file instead of adding one
+    """
+    return f"{socket.gethostname()}-{slot}"
+
+def enqueue_cities(cursor, cities):
+    """
+    Queue every configured city for a new run
+    Finished jobs and expired leases are reset to pending, jobs under a live lease are left alone
+    """
+    for city in cities:
+        cursor.execute("""
+            INSERT INTO work_queue (city_name, latitude, longitude)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (latitude, longitude) DO UPDATE SET
+                city_name = EXCLUDED.city_name,
+                status = 'pending',
+                leased_by = NULL,
+                lease_expires_at = NULL,
+                attempts = 0,
+                completed_at = NULL
+            WHERE work_queue.status IN ('done', 'failed')
+               OR (work_queue.status = 'leased' AND work_queue.lease_expires_at < CURRENT_TIMESTAMP)
+        """, (city['name'], city['lat'], city['lon']))
+
+def fail_expired_jobs(cursor, max_attempts):
+    """
+    Mark jobs failed whose worker died on their last allowed attempt
+    Their lease has expired but they can't be claimed again, so without this they would stay leased forever
+    Returns the number of jobs marked failed
+    """
+    cursor.execute("""
+        UPDATE work_queue SET
+            status = 'failed',
+            leased_by = NULL,
+            lease_expires_at = NULL
+        WHERE status = 'leased'
+          AND lease_expires_at < CURRENT_TIMESTAMP
+          AND attempts >= %s
+    """, (max_attempts,))
+    return cursor.rowcount
+
+def claim_batch(cursor, worker_id, batch_size, lease_seconds, max_attempts):
+    """
+    Lease up to batch_size cities for this worker
+    Pending jobs and jobs whose lease has expired (dead workers) can be claimed;
+    expired jobs that have used up max_attempts are marked failed first.
+    SKIP LOCKED lets concurrent workers claim disjoint batches without waiting on each other.
+    Returns a list of city dicts (same shape as config.yaml entries plus job_id)
+    """
+    failed = fail_expired_jobs(cursor, max_attempts)
+    if failed:
+        logger.warning("Marked %d jobs failed after their last attempt's lease expired", failed)
+
+    cursor.execute("""
+        UPDATE work_queue SET
+            status = 'leased',
+            leased_by = %s,
+            lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+            attempts = attempts + 1
+        WHERE job_id IN (
+            SELECT job_id FROM work_queue
+            WHERE attempts < %s
+              AND (status = 'pending'
+                   OR (status = 'leased' AND lease_expires_at < CURRENT_TIMESTAMP))
+            ORDER BY job_id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING job_id, city_name, latitude, longitude
+    """, (worker_id, lease_seconds, max_attempts, batch_size))
+
+    return [
+        {'job_id': job_id, 'name': name, 'lat': float(lat), 'lon': float(lon)}
+        for job_id, name, lat, lon in cursor.fetchall()
+    ]
+
+def renew_lease(cursor, worker_id, job_id, lease_seconds):
+    """
+    Extend this worker's lease on a job before working on it, so cities late in a slow batch don't expire
+    Returns False if the lease was lost (expired and reclaimed by another worker)
+    """
+    cursor.execute("""
+        UPDATE work_queue SET
+            lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+        WHERE job_id = %s AND leased_by = %s AND status = 'leased'
+    """, (lease_seconds, job_id, worker_id))
+    return cursor.rowcount == 1
+
+def complete_job(cursor, worker_id, job_id):
+    """
+    Mark a leased job as done
+    Returns False if the lease was lost (expired and reclaimed by another worker)
+    """
+    cursor.execute("""
+        UPDATE work_queue SET
+            status = 'done',
+            leased_by = NULL,
+            lease_expires_at = NULL,
+            completed_at = CURRENT_TIMESTAMP
+        WHERE job_id = %s AND leased_by = %s
+    """, (job_id, worker_id))
+    return cursor.rowcount == 1
+
+def release_job(cursor, worker_id, job_id, max_attempts):
+    """
+    Hand a job back after a failure so another worker can retry it
+    Jobs that have used up max_attempts are marked failed instead
+    """
+    cursor.execute("""
+        UPDATE work_queue SET
+            status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+            leased_by = NULL,
+            lease_expires_at = NULL
+        WHERE job_id = %s AND leased_by = %s
+    """, (max_attempts, job_id, worker_id))
+
+def run_worker(batch_size, lease_seconds, max_attempts, upsert_mode, metrics_settings=None, slot=0):
+    """
+    Claim and process batches until the queue is drained
+    Each city's weather rows and its lease release are committed in the same transaction
+    metrics_settings is the config.yaml 'metrics' section; each worker writes its own metrics file,
+    named after its host and local slot number
+    """
+    worker_id = get_worker_id()
+    metrics_settings = metrics_settings or {}
+    metrics.start(metrics_settings)
+    conn = None
+    cursor = None
+    processed = 0
+    counts = Counter()
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        logger.info("Worker %s connected to database", worker_id)
+
+        while True:
+            batch = claim_batch(cursor, worker_id, batch_size, lease_seconds, max_attempts)
+            conn.commit()  # Make the lease visible to other workers
+
+            if not batch:
+                break
+
+            logger.info("Worker %s leased %d cities: %s", worker_id, len(batch), [c['name'] for c in batch])
+
+            for city in batch:
+                renewed = renew_lease(cursor, worker_id, city['job_id'], lease_seconds)
+                conn.commit()
+                if not renewed:
+                    logger.warning("Worker %s lost lease on %s before starting it - skipping", worker_id, city['name'])
+                    continue
+
+                logger.info("Processing %s...", city['name'])
+                city_counts = Counter()
+                try:
+                    loaded = process_city(cursor, city, city_counts, upsert_mode)
+                except Exception as e:
+                    logger.error("Error processing %s: %s", city['name'], e)
+                    loaded = None
+                    conn.rollback()
+
+                if loaded is None:
+                    release_job(cursor, worker_id, city['job_id'], max_attempts)
+                elif not complete_job(cursor, worker_id, city['job_id']):
+                    logger.warning("Worker %s lost lease on %s - another worker has reclaimed it", worker_id, city['name'])
+                else:
+                    processed += 1
+                    counts.update(city_counts)
+                with metrics.timer('commit_seconds'):
+                    conn.commit()
+
+        logger.info("Worker %s finished - queue drained after %d cities", worker_id, processed)
+        logger.info("Worker %s rows: %d inserted, %d updated, %d unchanged",
+                    worker_id, counts['inserted'], counts['updated'], counts['unchanged'])
+
+    except Exception as e:
+        logger.error("Error in worker %s: %s", worker_id, e)
+        if conn:
+            conn.rollback()
+
+    finally:
+        # Also on failure, so a broken run still leaves its summary and metrics behind
+        metrics.finish(metrics_settings, worker=get_worker_slot(slot))
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def _run_worker_process(*worker_args, slot):
+    """
+    Entry point for local child processes
+    A forked child has no logging listener thread and skips atexit, so logging is set up and flushed here
+    """
+    setup_logging('pipeline.log', **load_config().get('logging', {}))
+    try:
+        run_worker(*worker_args, slot=slot)
+    finally:
+        shutdown_logging()
+
+def enqueue_from_config():
+    """Load cities from config.yaml into the work queue"""
+    config = load_config()
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            enqueue_cities(cursor, config['cities'])
+        conn.commit()
+        logger.info("Queued %d cities", len(config['cities']))
+    finally:
+        conn.close()
+
+def main(argv=None):
+    """
+    Run the pipeline in distributed mode
+    Start as many of these as needed, on one machine or many, against the same database
+    """
+    config = load_config()
+    settings = config.get('distributed', {})
+
+    parser = argparse.ArgumentParser(description="Distributed weather ETL worker")
+    parser.add_argument('--enqueue', action='store_true',
+                        help="queue all cities from config.yaml before working")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of local worker processes to start")
+    parser.add_argument('--batch-size', type=int,
+                        default=settings.get('batch_size', DEFAULT_BATCH_SIZE))
+    parser.add_argument('--lease-seconds', type=int,
+                        default=settings.get('lease_seconds', DEFAULT_LEASE_SECONDS))
+    parser.add_argument('--max-attempts', type=int,
+                        default=settings.get('max_attempts', DEFAULT_MAX_ATTEMPTS))
+    parser.add_argument('--first-slot', type=int, default=0,
+                        help="slot number of the first local worker, used to name its metrics file "
+                             "(give separate invocations on one host non-overlapping slots)")
+    args = parser.parse_args(argv)
+
+    if args.enqueue:
+        enqueue_from_config()
+
+    worker_args = (args.batch_size, args.lease_seconds, args.max_attempts, get_upsert_mode(config),
+                   config.get('metrics', {}))
+
+    if args.workers == 1:
+        run_worker(*worker_args, slot=args.first_slot)
+        return
+
+    import multiprocessing
+    processes = [
+        multiprocessing.Process(target=_run_worker_process, args=worker_args,
+                                kwargs={'slot': args.first_slot + i})
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    bootstrap.initialise('pipeline.log')
+    main()
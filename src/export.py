@@ -0,0 +1,268 @@
+import argparse
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+import bootstrap
+from extract import load_config
+
+logger = logging.getLogger(__name__)
+
+# pyarrow is only needed here, so it is imported inside the functions that write/read Parquet
+
+# Defaults used when config.yaml has no 'export' section
+DEFAULT_DIRECTORY = 'exports/daily_weather'
+DEFAULT_COMPACT_MIN_FILES = 10
+DEFAULT_MAX_ROWS_PER_FILE = 500000
+FETCH_BATCH_SIZE = 10000
+
+STATE_FILE = '_export_state.json'
+KEY_COLUMNS = ('city_id', 'forecast_date')
+
+def partition_for(forecast_date):
+    """Hive-style partition directory for a row, one per forecast month, e.g. forecast_month=2026-03"""
+    return f"forecast_month={forecast_date.strftime('%Y-%m')}"
+
+def read_state(directory):
+    """Return the export state (high-water mark etc.), or an empty dict before the first export"""
+    path = os.path.join(directory, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def write_state(directory, state):
+    """Write the state file atomically so a crash never leaves it half-written"""
+    path = os.path.join(directory, STATE_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+def latest_row_indices(keys, versions):
+    """
+    Indices of the newest version of each key, in first-seen key order
+    keys and versions are parallel sequences; a later row wins a tie
+    """
+    latest = {}
+    for index, (key, version) in enumerate(zip(keys, versions)):
+        current = latest.get(key)
+        if current is None or version >= versions[current]:
+            latest[key] = index
+    return list(latest.values())
+
+# Arrow type names for the PostgreSQL types in daily_weather, keyed by type OID (cursor.description type_code).
+# DECIMAL is stored as float64 for analytics.
+PG_ARROW_TYPES = {
+    16: 'bool',
+    20: 'int64',
+    21: 'int16',
+    23: 'int32',
+    25: 'string',
+    700: 'float32',
+    701: 'float64',
+    1043: 'string',
+    1082: 'date32',
+    1700: 'float64',
+}
+# timestamp / timestamptz -> time zone of the Arrow timestamp
+PG_TIMESTAMP_ZONES = {
+    1114: None,
+    1184: 'UTC',
+}
+
+def arrow_schema(description):
+    """
+    Fixed Arrow schema for the exported columns, from the cursor's PostgreSQL type codes
+    Every file gets the same types even when a column is entirely NULL in its batch
+    """
+    import pyarrow as pa
+
+    fields = []
+    for column in description:
+        name, type_code = column[0], column[1]
+        if type_code in PG_TIMESTAMP_ZONES:
+            arrow_type = pa.timestamp('us', tz=PG_TIMESTAMP_ZONES[type_code])
+        elif type_code in PG_ARROW_TYPES:
+            arrow_type = getattr(pa, PG_ARROW_TYPES[type_code])()
+        else:
+            raise ValueError(f"No Parquet type for column '{name}' (PostgreSQL type OID {type_code})")
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+def _to_table(schema, rows):
+    """Build an Arrow table in the fixed schema from DB rows"""
+    import pyarrow as pa
+
+    arrays = []
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if pa.types.is_floating(field.type):
+            # DECIMAL values arrive as Decimal, which Arrow only converts via its own decimal type
+            arrays.append(pa.array(values).cast(field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def _write_file(partition_dir, prefix, table):
+    """Write a Parquet file under a temporary name and move it into place"""
+    import pyarrow.parquet as pq
+
+    os.makedirs(partition_dir, exist_ok=True)
+    name = f"{prefix}-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+    tmp_path = os.path.join(partition_dir, f".{name}.tmp")
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, os.path.join(partition_dir, name))
+    return name
+
+def visible_cutoff(cursor):
+    """
+    Exclusive updated_at bound below which every row is committed
+    updated_at is the writing transaction's start time, so rows not yet visible all belong to transactions still
+    open. The bound is the start of the oldest other open transaction, or this transaction's start if there is none.
+    Other roles' transactions only count if this role can see them in pg_stat_activity.
+    """
+    cursor.execute("""
+        SELECT LEAST(CURRENT_TIMESTAMP, min(xact_start))
+        FROM pg_stat_activity
+        WHERE datname = current_database()
+          AND backend_type = 'client backend'
+          AND pid <> pg_backend_pid()
+          AND xact_start IS NOT NULL
+    """)
+    return cursor.fetchone()[0]
+
+def export_changes(conn, directory, max_rows_per_file=DEFAULT_MAX_ROWS_PER_FILE):
+    """
+    Write daily_weather rows inserted or changed since the last export to Parquet files
+    Rows are selected by updated_at from the stored high-water mark up to visible_cutoff(), so rows of
+    transactions still in flight are left for the next export rather than skipped.
+    Returns the number of rows exported
+    """
+    os.makedirs(directory, exist_ok=True)
+    state = read_state(directory)
+    high_water_mark = state.get('high_water_mark')
+
+    with conn.cursor() as cursor:
+        cutoff = visible_cutoff(cursor)
+    conn.commit()
+
+    # Named (server-side) cursor streams rows instead of loading the whole result into memory.
+    # It runs in a new transaction, whose snapshot includes every transaction that started before the cutoff.
+    cursor = conn.cursor(name='daily_weather_export')
+    cursor.itersize = FETCH_BATCH_SIZE
+    if high_water_mark:
+        cursor.execute("""
+            SELECT * FROM daily_weather
+            WHERE updated_at >= %s AND updated_at < %s
+            ORDER BY updated_at
+        """, (high_water_mark, cutoff))
+    else:
+        cursor.execute("""
+            SELECT * FROM daily_weather
+            WHERE updated_at < %s
+            ORDER BY updated_at
+        """, (cutoff,))
+
+    buffers = {}
+    exported = 0
+    schema = None
+    date_index = None
+
+    def flush(partition):
+        rows = buffers.pop(partition)
+        name = _write_file(os.path.join(directory, partition), 'part', _to_table(schema, rows))
+        logger.info("Exported %d rows to %s/%s", len(rows), partition, name)
+
+    try:
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            if schema is None:
+                schema = arrow_schema(cursor.description)
+                date_index = schema.get_field_index('forecast_date')
+
+            for row in rows:
+                partition = partition_for(row[date_index])
+                buffers.setdefault(partition, []).append(row)
+                if len(buffers[partition]) >= max_rows_per_file:
+                    flush(partition)
+            exported += len(rows)
+
+        for partition in list(buffers):
+            flush(partition)
+    finally:
+        cursor.close()
+        conn.commit()
+
+    # Only move the mark once every file is in place - a crash before this re-exports (compaction dedupes)
+    state['high_water_mark'] = cutoff.isoformat()
+    state['last_export'] = datetime.now(timezone.utc).isoformat()
+    state['last_export_rows'] = exported
+    write_state(directory, state)
+
+    logger.info("Exported %d new or changed rows (high-water mark %s)", exported, state['high_water_mark'])
+    return exported
+
+def compact_partition(partition_dir):
+    """
+    Merge all Parquet files in a partition into one, keeping only the newest version of each
+    (city_id, forecast_date) row. The merged file is in place before the old files are removed.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    files = sorted(f for f in os.listdir(partition_dir) if f.endswith('.parquet'))
+    # promote_options still merges files written before exports used a fixed schema
+    table = pa.concat_tables([pq.read_table(os.path.join(partition_dir, f)) for f in files], promote_options='default')
+
+    keys = list(zip(*(table.column(name).to_pylist() for name in KEY_COLUMNS)))
+    versions = table.column('updated_at').to_pylist()
+    table = table.take(latest_row_indices(keys, versions))
+
+    name = _write_file(partition_dir, 'compacted', table)
+    for f in files:
+        os.remove(os.path.join(partition_dir, f))
+    logger.info("Compacted %d files into %s (%d rows)", len(files), name, table.num_rows)
+
+def compact(directory, min_files=DEFAULT_COMPACT_MIN_FILES):
+    """Compact every partition that has accumulated at least min_files files"""
+    if not os.path.isdir(directory):
+        return
+    for partition in sorted(os.listdir(directory)):
+        partition_dir = os.path.join(directory, partition)
+        if not os.path.isdir(partition_dir):
+            continue
+        file_count = sum(1 for f in os.listdir(partition_dir) if f.endswith('.parquet'))
+        if file_count >= min_files:
+            compact_partition(partition_dir)
+
+def run_export(conn, settings):
+    """Export new/changed rows and compact small files, using the 'export' section of config.yaml"""
+    directory = settings.get('directory', DEFAULT_DIRECTORY)
+    export_changes(conn, directory, settings.get('max_rows_per_file', DEFAULT_MAX_ROWS_PER_FILE))
+    compact(directory, settings.get('compact_min_files', DEFAULT_COMPACT_MIN_FILES))
+
+def main(argv=None):
+    """Export daily_weather changes to Parquet outside the load run"""
+    settings = load_config().get('export', {})
+
+    parser = argparse.ArgumentParser(description="Incremental Parquet export of daily_weather")
+    parser.add_argument('--compact-all', action='store_true',
+                        help="compact every partition with more than one file, regardless of compact_min_files")
+    args = parser.parse_args(argv)
+
+    from load_database import get_db_connection
+    conn = get_db_connection()
+    try:
+        run_export(conn, settings)
+        if args.compact_all:
+            compact(settings.get('directory', DEFAULT_DIRECTORY), min_files=2)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    bootstrap.initialise('export.log')
+    main()
@@ -1,44 +1,74 @@
-import requests
-import yaml
 import json
 from datetime import datetime
-from dotenv import load_dotenv
 import os
+import argparse
+import bootstrap
+import metrics
+import profiling
 
-# Load environment variables
-load_dotenv() # This and the dotenv import work fine despite weird highlighting
+# requests and yaml are imported inside the functions that use them to keep startup fast
+
+# API base URL - override with WEATHER_API_URL (e.g. to point at the benchmark fake server)
+DEFAULT_API_URL = "https://weatherbit-v1-mashape.p.rapidapi.com"
+
+# Seconds to wait for the API to connect or send data - override with WEATHER_API_TIMEOUT.
+# Without one a hung connection would block its caller (or a backfill pool thread) forever.
+DEFAULT_API_TIMEOUT = 30
 
 def load_config():
-    """Load configuration from YAML file"""
-    with open('config/config.yaml', 'r') as file:
+    """Load configuration from YAML file (path can be overridden with CONFIG_PATH)"""
+    import yaml
+    with open(os.getenv('CONFIG_PATH', 'config/config.yaml'), 'r') as file:
         return yaml.safe_load(file)
 
-def fetch_weather_data(lat, lon):
-    """Fetch weather data from RapidAPI for given coordinates"""
+def _api_get(endpoint, params):
+    """GET a Weatherbit endpoint through RapidAPI, returning the JSON body or None on failure"""
+    import requests
     api_key = os.getenv('RAPIDAPI_KEY')
     
-    url = "https://weatherbit-v1-mashape.p.rapidapi.com/forecast/daily"
+    url = f"{os.getenv('WEATHER_API_URL', DEFAULT_API_URL)}/{endpoint}"
+    timeout = float(os.getenv('WEATHER_API_TIMEOUT', DEFAULT_API_TIMEOUT))
     
     headers = {
         "X-RapidAPI-Key": api_key,
         "X-RapidAPI-Host": "weatherbit-v1-mashape.p.rapidapi.com"
     }
     
-    params = {
-        "lat": lat,
-        "lon": lon,
-        "units": "metric",
-        "lang": "en"
-    }
-    
     try:
-        response = requests.get(url, headers=headers, params=params)
+        with metrics.timer('fetch_seconds', endpoint=endpoint):
+            response = requests.get(url, headers=headers, params=params, timeout=timeout)
         response.raise_for_status() # Raise an exception if you get 4 or 5 hundreds codes
         return response.json()
     except requests.exceptions.RequestException as e:
+        metrics.inc('fetch_errors', endpoint=endpoint)
         print(f"Error fetching data: {e}")
         return None
 
+def fetch_weather_data(lat, lon):
+    """Fetch weather data from RapidAPI for given coordinates"""
+    params = {
+        "lat": lat,
+        "lon": lon,
+        "units": "metric",
+        "lang": "en"
+    }
+    return _api_get('forecast/daily', params)
+
+def fetch_history_data(lat, lon, start_date, end_date):
+    """
+    Fetch observed daily weather for given coordinates between start_date and end_date (YYYY-MM-DD)
+    end_date is exclusive, as in the Weatherbit history API
+    """
+    params = {
+        "lat": lat,
+        "lon": lon,
+        "start_date": start_date,
+        "end_date": end_date,
+        "units": "metric",
+        "lang": "en"
+    }
+    return _api_get('history/daily', params)
+
 def save_raw_data(data, city_name):
     """Save raw API response to file for debugging"""
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -55,13 +85,27 @@ def main():
     for city in config['cities']:
         print(f"\nFetching weather data for {city['name']}...")
         
-        weather_data = fetch_weather_data(city['lat'], city['lon'])
+        with profiling.stage('fetch'):
+            weather_data = fetch_weather_data(city['lat'], city['lon'])
         
         if weather_data:
-            save_raw_data(weather_data, city['name'])
+            with profiling.stage('save'):
+                save_raw_data(weather_data, city['name'])
             print(f"✓ Successfully fetched data for {city['name']}")
         else:
             print(f"✗ Failed to fetch data for {city['name']}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch raw weather data for each city")
+    parser.add_argument('--profile', action='store_true',
+                        help="profile the run and save a report under logs/profiles/")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    bootstrap.initialise()
+    if args.profile:
+        report_path = profiling.profile_run('extract', main)
+        print(f"Saved profile report to {report_path}")
+    else:
+        main()
\ No newline at end of file
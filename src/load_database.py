@@ -1,20 +1,20 @@
-import psycopg2
 import os
-from dotenv import load_dotenv
+import argparse
+from collections import Counter
 from extract import fetch_weather_data, load_config
 from validate_data import validate_weather_record
 import logging
-from logger_config import setup_logging
+import bootstrap
+import metrics
+import profiling
+from records import WeatherRecord, DAILY_WEATHER_COLUMNS, CONFLICT_COLUMNS, UPDATE_COLUMNS
 
-# Load environment variables
-load_dotenv()
-
-# Configure logging
-setup_logging('pipeline.log')
+# .env and logging are set up by the entry point (bootstrap.initialise), not on import
 logger = logging.getLogger(__name__)
 
 def get_db_connection():
     """Create and return a database connection"""
+    import psycopg2
     conn_params = {
         "host": os.getenv("DB_HOST"),
         "port": os.getenv("DB_PORT"),
@@ -58,10 +58,10 @@ def insert_or_get_city(cursor, city_data, api_response):
         
         return cursor.fetchone()[0]
 
-def transform_weather_record(day_data):
+def transform_weather_record(day_data, city_id=None):
     """
     Transform API weather data to match database schema
-    Returns a dictionary with keys matching database columns
+    Returns a WeatherRecord whose fields are in daily_weather column order
     """
     # Extract nested weather object
     weather = day_data.get('weather', {})
@@ -82,168 +82,163 @@ def transform_weather_record(day_data):
     else:
         precip_category = 'Heavy'
     
-    return {
-        'forecast_date': day_data.get('datetime'),
-        'temp': day_data.get('temp'),
-        'max_temp': day_data.get('max_temp'),
-        'min_temp': day_data.get('min_temp'),
-        'apparent_max_temp': day_data.get('app_max_temp'),
-        'apparent_min_temp': day_data.get('app_min_temp'),
-        'high_temp': day_data.get('high_temp'),
-        'low_temp': day_data.get('low_temp'),
-        'dewpt': day_data.get('dewpt'),
-        'precipitation': day_data.get('precip'),
-        'pop': day_data.get('pop'),
-        'snow': day_data.get('snow'),
-        'snow_depth': day_data.get('snow_depth'),
-        'wind_speed': day_data.get('wind_spd'),
-        'wind_gust_spd': day_data.get('wind_gust_spd'),
-        'wind_dir': day_data.get('wind_dir'),
-        'wind_cdir': day_data.get('wind_cdir'),
-        'wind_cdir_full': day_data.get('wind_cdir_full'),
-        'clouds': day_data.get('clouds'),
-        'clouds_hi': day_data.get('clouds_hi'),
-        'clouds_low': day_data.get('clouds_low'),
-        'clouds_mid': day_data.get('clouds_mid'),
-        'vis': day_data.get('vis'),
-        'humidity': day_data.get('rh'),
-        'pressure': day_data.get('pres'),
-        'slp': day_data.get('slp'),
-        'ozone': day_data.get('ozone'),
-        'uv': day_data.get('uv'),
-        'weather_code': weather.get('code'),
-        'weather_description': weather.get('description'),
-        'weather_icon': weather.get('icon'),
-        'moon_phase': day_data.get('moon_phase'),
-        'moon_phase_lunation': day_data.get('moon_phase_lunation'),
-        'sunrise_ts': day_data.get('sunrise_ts'),
-        'sunset_ts': day_data.get('sunset_ts'),
-        'moonrise_ts': day_data.get('moonrise_ts'),
-        'moonset_ts': day_data.get('moonset_ts'),
-        'max_dhi': day_data.get('max_dhi'),
+    # Positional arguments, in column order - see records.WeatherRecord for the names
+    get = day_data.get
+    return WeatherRecord(
+        city_id,
+        get('datetime'),
+        get('temp'),
+        max_temp,
+        min_temp,
+        get('app_max_temp'),
+        get('app_min_temp'),
+        get('high_temp'),
+        get('low_temp'),
+        get('dewpt'),
+        get('precip'),
+        get('pop'),
+        get('snow'),
+        get('snow_depth'),
+        get('wind_spd'),
+        get('wind_gust_spd'),
+        get('wind_dir'),
+        get('wind_cdir'),
+        get('wind_cdir_full'),
+        get('clouds'),
+        get('clouds_hi'),
+        get('clouds_low'),
+        get('clouds_mid'),
+        get('vis'),
+        get('rh'),
+        get('pres'),
+        get('slp'),
+        get('ozone'),
+        get('uv'),
+        weather.get('code'),
+        weather.get('description'),
+        weather.get('icon'),
+        get('moon_phase'),
+        get('moon_phase_lunation'),
+        get('sunrise_ts'),
+        get('sunset_ts'),
+        get('moonrise_ts'),
+        get('moonset_ts'),
+        get('max_dhi'),
         # Derived fields
-        'temp_range': temp_range,
-        'precip_category': precip_category,
-        'ts': day_data.get('ts')
-    }
+        temp_range,
+        precip_category,
+        get('ts')
+    )
+
+# Upsert modes (config.yaml load.upsert_mode)
+# 'changed' - existing rows are only rewritten when a value differs, so identical re-fetches cost no new tuple/WAL
+# 'always'  - every conflicting row is rewritten
+UPSERT_MODES = ('changed', 'always')
+DEFAULT_UPSERT_MODE = 'changed'
+
+# Built once from the record layout so the column list and parameter order can't drift apart
+_UPDATE_ASSIGNMENTS = ',\n        '.join(f'{column} = EXCLUDED.{column}' for column in UPDATE_COLUMNS)
+_UPSERT_SQL = f"""
+    INSERT INTO daily_weather ({', '.join(DAILY_WEATHER_COLUMNS)})
+    VALUES ({', '.join(['%s'] * len(DAILY_WEATHER_COLUMNS))})
+    ON CONFLICT ({', '.join(CONFLICT_COLUMNS)}) DO UPDATE SET
+        {_UPDATE_ASSIGNMENTS},
+        updated_at = CURRENT_TIMESTAMP
+"""
+# xmax is 0 only for a freshly inserted row version, which tells inserts and updates apart
+_RETURNING_SQL = """
+    RETURNING (xmax = 0) AS inserted
+"""
+_CHANGED_ONLY_SQL = f"""
+    WHERE ({', '.join(f'daily_weather.{column}' for column in UPDATE_COLUMNS)})
+        IS DISTINCT FROM ({', '.join(f'EXCLUDED.{column}' for column in UPDATE_COLUMNS)})
+"""
+INSERT_WEATHER_SQL = _UPSERT_SQL + _RETURNING_SQL
+INSERT_CHANGED_WEATHER_SQL = _UPSERT_SQL + _CHANGED_ONLY_SQL + _RETURNING_SQL
 
-def insert_weather_record(cursor, city_id, weather_data):
+def get_upsert_mode(config):
+    """Read load.upsert_mode from the config, defaulting to 'changed'"""
+    upsert_mode = config.get('load', {}).get('upsert_mode', DEFAULT_UPSERT_MODE)
+    if upsert_mode not in UPSERT_MODES:
+        raise ValueError(f"Unknown upsert_mode '{upsert_mode}' (expected one of {UPSERT_MODES})")
+    return upsert_mode
+
+def insert_weather_record(cursor, record, upsert_mode=DEFAULT_UPSERT_MODE):
     """
     Insert a single weather record into the database
+    The WeatherRecord is itself the parameter tuple, so nothing is copied
+    Returns 'inserted', 'updated' or 'unchanged' (existing row identical, nothing written)
     """
-    cursor.execute("""
-        INSERT INTO daily_weather (
-            city_id, forecast_date,
-            temp, max_temp, min_temp,
-            apparent_max_temp, apparent_min_temp, high_temp, low_temp, dewpt,
-            precipitation, pop, snow, snow_depth,
-            wind_speed, wind_gust_spd, wind_dir, wind_cdir, wind_cdir_full,
-            clouds, clouds_hi, clouds_low, clouds_mid, vis,
-            humidity, pressure, slp, ozone, uv,
-            weather_code, weather_description, weather_icon,
-            moon_phase, moon_phase_lunation, sunrise_ts, sunset_ts, moonrise_ts, moonset_ts,
-            max_dhi,
-            temp_range, precip_category,
-            ts
-        ) VALUES (
-            %s, %s,
-            %s, %s, %s,
-            %s, %s, %s, %s, %s,
-            %s, %s, %s, %s,
-            %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s,
-            %s, %s, %s,
-            %s, %s, %s, %s, %s, %s,
-            %s,
-            %s, %s,
-            %s
-        )
-        ON CONFLICT (city_id, forecast_date) DO UPDATE SET
-            temp = EXCLUDED.temp,
-            max_temp = EXCLUDED.max_temp,
-            min_temp = EXCLUDED.min_temp,
-            apparent_max_temp = EXCLUDED.apparent_max_temp,
-            apparent_min_temp = EXCLUDED.apparent_min_temp,
-            high_temp = EXCLUDED.high_temp,
-            low_temp = EXCLUDED.low_temp,
-            dewpt = EXCLUDED.dewpt,
-            precipitation = EXCLUDED.precipitation,
-            pop = EXCLUDED.pop,
-            snow = EXCLUDED.snow,
-            snow_depth = EXCLUDED.snow_depth,
-            wind_speed = EXCLUDED.wind_speed,
-            wind_gust_spd = EXCLUDED.wind_gust_spd,
-            wind_dir = EXCLUDED.wind_dir,
-            wind_cdir = EXCLUDED.wind_cdir,
-            wind_cdir_full = EXCLUDED.wind_cdir_full,
-            clouds = EXCLUDED.clouds,
-            clouds_hi = EXCLUDED.clouds_hi,
-            clouds_low = EXCLUDED.clouds_low,
-            clouds_mid = EXCLUDED.clouds_mid,
-            vis = EXCLUDED.vis,
-            humidity = EXCLUDED.humidity,
-            pressure = EXCLUDED.pressure,
-            slp = EXCLUDED.slp,
-            ozone = EXCLUDED.ozone,
-            uv = EXCLUDED.uv,
-            weather_code = EXCLUDED.weather_code,
-            weather_description = EXCLUDED.weather_description,
-            weather_icon = EXCLUDED.weather_icon,
-            moon_phase = EXCLUDED.moon_phase,
-            moon_phase_lunation = EXCLUDED.moon_phase_lunation,
-            sunrise_ts = EXCLUDED.sunrise_ts,
-            sunset_ts = EXCLUDED.sunset_ts,
-            moonrise_ts = EXCLUDED.moonrise_ts,
-            moonset_ts = EXCLUDED.moonset_ts,
-            max_dhi = EXCLUDED.max_dhi,
-            temp_range = EXCLUDED.temp_range,
-            precip_category = EXCLUDED.precip_category,
-            ts = EXCLUDED.ts
-    """, (
-        city_id,
-        weather_data['forecast_date'],
-        weather_data['temp'],
-        weather_data['max_temp'],
-        weather_data['min_temp'],
-        weather_data['apparent_max_temp'],
-        weather_data['apparent_min_temp'],
-        weather_data['high_temp'],
-        weather_data['low_temp'],
-        weather_data['dewpt'],
-        weather_data['precipitation'],
-        weather_data['pop'],
-        weather_data['snow'],
-        weather_data['snow_depth'],
-        weather_data['wind_speed'],
-        weather_data['wind_gust_spd'],
-        weather_data['wind_dir'],
-        weather_data['wind_cdir'],
-        weather_data['wind_cdir_full'],
-        weather_data['clouds'],
-        weather_data['clouds_hi'],
-        weather_data['clouds_low'],
-        weather_data['clouds_mid'],
-        weather_data['vis'],
-        weather_data['humidity'],
-        weather_data['pressure'],
-        weather_data['slp'],
-        weather_data['ozone'],
-        weather_data['uv'],
-        weather_data['weather_code'],
-        weather_data['weather_description'],
-        weather_data['weather_icon'],
-        weather_data['moon_phase'],
-        weather_data['moon_phase_lunation'],
-        weather_data['sunrise_ts'],
-        weather_data['sunset_ts'],
-        weather_data['moonrise_ts'],
-        weather_data['moonset_ts'],
-        weather_data['max_dhi'],
-        weather_data['temp_range'],
-        weather_data['precip_category'],
-        weather_data['ts']
-    ))
+    sql = INSERT_CHANGED_WEATHER_SQL if upsert_mode == 'changed' else INSERT_WEATHER_SQL
+    cursor.execute(sql, record)
+    result = cursor.fetchone()
+
+    # No row comes back when the WHERE clause skipped the update
+    if result is None:
+        return 'unchanged'
+    return 'inserted' if result[0] else 'updated'
+
+def process_city(cursor, city, counts=None, upsert_mode=DEFAULT_UPSERT_MODE):
+    """
+    Fetch, validate, transform and load the forecast for a single city
+    counts (optional Counter) is increased by one per row under 'inserted', 'updated' or 'unchanged'
+    Returns the number of rows upserted, or None if the fetch failed
+    """
+    # Extract: Fetch weather data from API
+    metrics.inc('cities_processed')
+    with profiling.stage('fetch'):
+        api_response = fetch_weather_data(city['lat'], city['lon'])
+    
+    if not api_response:
+        logger.error("Failed to fetch data for %s", city['name'])
+        return None
+    
+    return load_weather_response(cursor, city, api_response, counts, upsert_mode)
+
+def load_weather_response(cursor, city, api_response, counts=None, upsert_mode=DEFAULT_UPSERT_MODE):
+    """
+    Validate, transform and load every day in an API response (forecast or history)
+    Returns the number of rows upserted - days that fail validation are not counted
+    """
+    # Insert or get city
+    city_id = insert_or_get_city(cursor, city, api_response)
+    logger.info("City ID: %s", city_id)
+    
+    # Process each day of weather data
+    weather_days = api_response.get('data', [])
+    loaded = 0
+    for day_data in weather_days:
+
+        with metrics.timer('validate_seconds'), profiling.stage('validate'):
+            is_valid, warnings = validate_weather_record(day_data)
+
+        if not is_valid:
+            metrics.inc('records_skipped')
+            logger.warning("Skipping record: %s", warnings)
+            continue
+        
+        # Log warnings (but still insert)
+        if warnings:
+            if metrics.is_enabled():
+                for warning in warnings:
+                    metrics.inc('validation_warnings', rule=metrics.warning_rule(warning))
+            logger.warning("Data quality warnings for %s on %s: %s", city['name'], day_data.get('datetime'), warnings)
+
+        # Transform: Convert API format to DB format
+        with metrics.timer('transform_seconds'), profiling.stage('transform'):
+            record = transform_weather_record(day_data, city_id)
+        
+        # Load: Insert into database
+        with metrics.timer('upsert_seconds'), profiling.stage('load'):
+            outcome = insert_weather_record(cursor, record, upsert_mode)
+        metrics.inc('rows_loaded')
+        metrics.inc('rows_upserted', outcome=outcome)
+        if counts is not None:
+            counts[outcome] += 1
+        loaded += 1
+    
+    logger.info("Loaded %d of %d days of weather data for %s", loaded, len(weather_days), city['name'])
+    return loaded
 
 def main():
     """
@@ -251,56 +246,43 @@ def main():
     """
     conn = None
     cursor = None
+    metrics_settings = {}
     
     try:
+        # Load config (cities from config.yaml) - first, so metrics also cover a failed connection
+        config = load_config()
+        metrics_settings = config.get('metrics', {})
+        metrics.start(metrics_settings)
+
         # Connect to database
         conn = get_db_connection()
         cursor = conn.cursor()
         logger.info("Connected to database successfully!")
         
-        # Load config (cities from config.yaml)
-        config = load_config()
+        upsert_mode = get_upsert_mode(config)
+        counts = Counter()
         
         # Process each city
         for city in config['cities']:
-            logger.info(f"Processing {city['name']}...")
-            
-            # Extract: Fetch weather data from API
-            api_response = fetch_weather_data(city['lat'], city['lon'])
-            
-            if not api_response:
-                logger.error(f"Failed to fetch data for {city['name']}")
-                continue
-            
-            # Insert or get city
-            city_id = insert_or_get_city(cursor, city, api_response)
-            logger.info(f"City ID: {city_id}")
-            
-            # Process each day of weather data
-            weather_days = api_response.get('data', [])
-            for day_data in weather_days:
-
-                is_valid, warnings = validate_weather_record(day_data)
-    
-                if not is_valid:
-                    logger.warning(f"Skipping record: {warnings}")
-                    continue
-                
-                # Log warnings (but still insert)
-                if warnings:
-                    logger.warning(f"Data quality warnings for {city['name']} on {day_data.get('datetime')}: {warnings}")
-
-                # Transform: Convert API format to DB format
-                transformed_data = transform_weather_record(day_data)
-                
-                # Load: Insert into database
-                insert_weather_record(cursor, city_id, transformed_data)
-            
-            logger.info(f"Loaded {len(weather_days)} days of weather data for {city['name']}")
+            logger.info("Processing %s...", city['name'])
+            process_city(cursor, city, counts, upsert_mode)
         
         # Commit all changes
-        conn.commit()
+        with metrics.timer('commit_seconds'), profiling.stage('commit'):
+            conn.commit()
         logger.info("ETL pipeline completed successfully!")
+        logger.info("Rows: %d inserted, %d updated, %d unchanged",
+                    counts['inserted'], counts['updated'], counts['unchanged'])
+
+        # Export new/changed rows for analytics - a failed export leaves the committed load alone
+        export_config = config.get('export', {})
+        if export_config.get('enabled'):
+            try:
+                from export import run_export
+                with metrics.timer('export_seconds'), profiling.stage('export'):
+                    run_export(conn, export_config)
+            except Exception as e:
+                logger.error(f"Error exporting to Parquet: {e}")
         
     except Exception as e:
         logger.error(f"Error in ETL pipeline: {e}")
@@ -308,11 +290,24 @@ def main():
             conn.rollback()
     
     finally:
+        # Also on failure, so a broken run still leaves its summary and metrics behind
+        metrics.finish(metrics_settings)
         if cursor:
             cursor.close()
         if conn:
             conn.close()
         logger.info("Database connection closed.")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the weather ETL pipeline")
+    parser.add_argument('--profile', action='store_true',
+                        help="profile the run and save a report under logs/profiles/")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    bootstrap.initialise('pipeline.log')
+    if args.profile:
+        profiling.profile_run('load_database', main)
+    else:
+        main()
\ No newline at end of file
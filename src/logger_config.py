@@ -1,15 +1,153 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 
-def setup_logging(log_file='pipeline.log'):
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Background listener and repeat filter from the last setup_logging call, flushed at exit
+_listener = None
+_repeat_filter = None
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread
+    The stock QueueHandler formats in the caller, which is the cost we are trying to move off the hot path
+    """
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            # Tracebacks can't cross threads safely once the frame is gone, so render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """Format each record as a single JSON object per line"""
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'logger': record.name,
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        suppressed = getattr(record, 'suppressed', None)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        return json.dumps(entry, default=str)
+
+class RepeatFilter(logging.Filter):
+    """
+    Rate-limit repeated log lines
+    Records are grouped by logger and unformatted message template (so use %-style args, not f-strings).
+    Within each window the first `burst` records of a group pass; the rest are dropped and counted,
+    and the count is attached to the next record of that group that gets through.
+    Errors and above are never suppressed.
+    """
+    def __init__(self, window_seconds=60, burst=5):
+        super().__init__()
+        self.window_seconds = window_seconds
+        self.burst = burst
+        self._groups = {}  # key -> [window_start, seen_in_window, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        # Same record can reach several handlers - only count it once
+        allowed = getattr(record, 'repeat_allowed', None)
+        if allowed is not None:
+            return allowed
+        allowed = record.repeat_allowed = self._check(record)
+        return allowed
+
+    def _check(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None or now - group[0] >= self.window_seconds:
+                suppressed = group[2] if group else 0
+                self._groups[key] = [now, 1, 0]
+            elif group[1] < self.burst:
+                group[1] += 1
+                suppressed = 0
+            else:
+                group[2] += 1
+                return False
+
+        if suppressed:
+            record.suppressed = suppressed
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+    def pending_summary(self):
+        """Return (template, suppressed_count) for groups with dropped records not yet reported"""
+        with self._lock:
+            return [(key[2], group[2]) for key, group in self._groups.items() if group[2]]
+
+def shutdown_logging():
+    """Report suppressed repeats and drain the background queue (also runs at exit)"""
+    global _listener, _repeat_filter
+    if _repeat_filter:
+        pending = _repeat_filter.pending_summary()
+        _repeat_filter = None
+        for template, count in pending:
+            logging.getLogger(__name__).warning("%d similar messages suppressed: %s", count, template)
+    if _listener:
+        _listener.stop()  # Drains the queue before returning
+        _listener = None
+
+atexit.register(shutdown_logging)
+
+def setup_logging(log_file='pipeline.log', queue_mode=False, json_format=False,
+                  repeat_window_seconds=None, repeat_burst=5):
+    """
+    Configure logging to logs/<log_file> and the console
+
+    queue_mode: log calls only enqueue the record; a background listener thread formats it and does the file/console I/O
+    json_format: write one JSON object per line instead of plain text
+    repeat_window_seconds: if set, rate-limit repeated messages (see RepeatFilter)
+    """
+    global _listener, _repeat_filter
     os.makedirs('logs', exist_ok=True)
-    
+
+    # Flush anything left from an earlier call before replacing the handlers
+    shutdown_logging()
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(LOG_FORMAT)
+    handlers = [
+        logging.FileHandler(f'logs/{log_file}'),
+        logging.StreamHandler()
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if repeat_window_seconds:
+        _repeat_filter = RepeatFilter(repeat_window_seconds, repeat_burst)
+
+    if queue_mode:
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        root_handlers = [DeferredQueueHandler(log_queue)]
+    else:
+        root_handlers = handlers
+
+    if _repeat_filter:
+        # Filter before enqueueing so dropped records cost nothing downstream
+        for handler in root_handlers:
+            handler.addFilter(_repeat_filter)
+
     logging.basicConfig(
         level=logging.INFO, # Do not log anything below this level of severity
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(f'logs/{log_file}'),
-            logging.StreamHandler()
-        ],
+        handlers=root_handlers,
         force=True  # Override pre-existing config
-    )
\ No newline at end of file
+    )
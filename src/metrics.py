@@ -0,0 +1,238 @@
+import contextlib
+import os
+import re
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIX = 'weather_etl_'
+DEFAULT_FILE = 'logs/metrics.prom'
+
+# Instrumentation is off unless enable() is called - timer()/inc() are then near no-ops
+_enabled = False
+_run_started = None
+_counters = {}
+_histograms = {}
+# Guards _counters/_histograms - backfill records fetch timings from several threads at once
+_lock = threading.Lock()
+
+# Shared do-nothing context manager handed out while disabled
+_NULL_TIMER = contextlib.nullcontext()
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+    __slots__ = ('bucket_counts', 'total', 'count')
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def cumulative(self):
+        """Bucket counts as Prometheus expects them (each includes all smaller buckets)"""
+        running = 0
+        result = []
+        for count in self.bucket_counts:
+            running += count
+            result.append(running)
+        return result
+
+class _Timer:
+    """Context manager that records elapsed wall time into a histogram"""
+    __slots__ = ('key', 'start')
+
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _observe_key(self.key, time.perf_counter() - self.start)
+        return False
+
+def enable():
+    """Turn instrumentation on and start the run clock"""
+    global _enabled, _run_started
+    _enabled = True
+    _run_started = time.perf_counter()
+
+def start(settings):
+    """Turn instrumentation on if the config.yaml 'metrics' section enables it; returns whether it is on"""
+    if settings.get('enabled'):
+        enable()
+    return _enabled
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """Clear all recorded metrics (mainly for tests)"""
+    global _run_started
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+    _run_started = time.perf_counter() if _enabled else None
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+def _observe_key(key, value):
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+def inc(name, value=1, **labels):
+    """Increase a counter, e.g. inc('rows_loaded') or inc('validation_warnings', rule='...')"""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def observe(name, value, **labels):
+    """Record a single value (seconds) into a histogram"""
+    if not _enabled:
+        return
+    _observe_key(_key(name, labels), value)
+
+def timer(name, **labels):
+    """
+    Time a block of code into the named histogram
+    Usage: with metrics.timer('fetch_seconds'): ...
+    """
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(_key(name, labels))
+
+def warning_rule(warning):
+    """
+    Reduce a validation warning message to the rule that produced it
+    e.g. 'Invalid humidity: 101% (must be 0-100)' -> 'Invalid humidity'
+         'max_temp (10) < min_temp (20)' -> 'max_temp < min_temp'
+    """
+    if ':' in warning:
+        return warning.split(':', 1)[0].strip()
+    return re.sub(r'\s*\([^)]*\)', '', warning).strip()
+
+def get_counter(name, **labels):
+    return _counters.get(_key(name, labels), 0)
+
+def get_histogram(name, **labels):
+    return _histograms.get(_key(name, labels))
+
+def elapsed_seconds():
+    if _run_started is None:
+        return 0.0
+    return time.perf_counter() - _run_started
+
+def _format_labels(labels, extra=None):
+    items = list(labels)
+    if extra:
+        items.append(extra)
+    if not items:
+        return ''
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in items]
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+def render_prometheus(const_labels=()):
+    """
+    Render every metric in the Prometheus text exposition format
+    const_labels (pairs) are added to every series, e.g. (('worker', 'host-123'),)
+    """
+    const_labels = tuple(const_labels)
+    lines = []
+    seen_types = set()
+
+    for (name, labels), value in sorted(_counters.items()):
+        labels = const_labels + labels
+        full_name = f"{PREFIX}{name}_total"
+        if full_name not in seen_types:
+            lines.append(f"# TYPE {full_name} counter")
+            seen_types.add(full_name)
+        lines.append(f"{full_name}{_format_labels(labels)} {value}")
+
+    for (name, labels), histogram in sorted(_histograms.items()):
+        labels = const_labels + labels
+        full_name = f"{PREFIX}{name}"
+        if full_name not in seen_types:
+            lines.append(f"# TYPE {full_name} histogram")
+            seen_types.add(full_name)
+        for bound, count in zip(BUCKETS, histogram.cumulative()):
+            lines.append(f"{full_name}_bucket{_format_labels(labels, ('le', bound))} {count}")
+        lines.append(f"{full_name}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram.count}")
+        lines.append(f"{full_name}_sum{_format_labels(labels)} {histogram.total}")
+        lines.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+
+    elapsed = elapsed_seconds()
+    rows = get_counter('rows_loaded')
+    lines.append(f"# TYPE {PREFIX}run_seconds gauge")
+    lines.append(f"{PREFIX}run_seconds{_format_labels(const_labels)} {elapsed}")
+    lines.append(f"# TYPE {PREFIX}rows_per_second gauge")
+    lines.append(f"{PREFIX}rows_per_second{_format_labels(const_labels)} {rows / elapsed if elapsed else 0.0}")
+
+    return '\n'.join(lines) + '\n'
+
+def write_prometheus(path, const_labels=()):
+    """
+    Write metrics to a file (suitable for the node_exporter textfile collector)
+    Written to a temp file first so a scraper never reads a half-written file
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(render_prometheus(const_labels))
+    os.replace(tmp_path, path)
+
+def log_summary():
+    """Log an end-of-run summary of stage timings and counters"""
+    elapsed = elapsed_seconds()
+    rows = get_counter('rows_loaded')
+    logger.info(f"Run summary: {rows} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0.0:.1f} rows/s)")
+
+    for (name, labels), histogram in sorted(_histograms.items()):
+        label_text = f" {dict(labels)}" if labels else ''
+        mean_ms = histogram.total / histogram.count * 1000 if histogram.count else 0.0
+        logger.info(f"  {name}{label_text}: count={histogram.count} total={histogram.total:.3f}s mean={mean_ms:.2f}ms")
+
+    for (name, labels), value in sorted(_counters.items()):
+        label_text = f" {dict(labels)}" if labels else ''
+        logger.info(f"  {name}{label_text}: {value}")
+
+def finish(settings, worker=None):
+    """
+    Log the run summary and write the Prometheus file, if instrumentation is on
+    With worker set, every series gets a worker label and the file a _<worker> suffix,
+    so parallel worker processes don't overwrite or duplicate each other's metrics
+    """
+    if not _enabled:
+        return
+    log_summary()
+    path = settings.get('file', DEFAULT_FILE)
+    if worker is None:
+        write_prometheus(path)
+    else:
+        root, ext = os.path.splitext(path)
+        write_prometheus(f"{root}_{worker}{ext}", (('worker', worker),))
@@ -0,0 +1,178 @@
+import contextlib
+import logging
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = 'logs/profiles'
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 10
+TRACEMALLOC_FRAMES = 5
+
+# Per-stage memory tracking, only populated while profile_run is active
+_active = False
+_stages = {}
+_run_peak = 0  # Stages reset tracemalloc's peak, so the run-wide peak is kept here
+
+# Shared do-nothing context manager handed out while not profiling
+_NULL_STAGE = contextlib.nullcontext()
+
+class StageStats:
+    """
+    Time and peak memory seen inside one stage
+    snapshot is everything still allocated (by any code) when the stage's heaviest call ended
+    """
+    __slots__ = ('calls', 'seconds', 'peak', 'snapshot')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.peak = 0
+        self.snapshot = None
+
+class _Stage:
+    """Context manager that measures wall time and traced memory growth inside a stage"""
+    __slots__ = ('name', 'start', 'started')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        global _run_peak
+        current, peak = tracemalloc.get_traced_memory()
+        _run_peak = max(_run_peak, peak)
+        self.start = current
+        tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        peak = tracemalloc.get_traced_memory()[1] - self.start
+        stage = _stages.get(self.name)
+        if stage is None:
+            stage = _stages[self.name] = StageStats()
+        stage.calls += 1
+        stage.seconds += elapsed
+        if peak > stage.peak:
+            # Snapshots are expensive, so only take one when this stage hits a new high.
+            # It shows all live memory at exit, not just this stage's allocations or its peak.
+            stage.peak = peak
+            stage.snapshot = tracemalloc.take_snapshot()
+        return False
+
+def stage(name):
+    """
+    Mark a pipeline stage for the per-stage part of the profile report
+    Usage: with profiling.stage('fetch'): ...
+    """
+    if not _active:
+        return _NULL_STAGE
+    return _Stage(name)
+
+def _format_size(size):
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+def _top_allocations(snapshot, limit=TOP_ALLOCATIONS):
+    """Largest allocation sites in a snapshot, ignoring tracemalloc's own frames"""
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ])
+    lines = []
+    for stat in snapshot.statistics('lineno')[:limit]:
+        frame = stat.traceback[0]
+        lines.append(f"  {_format_size(stat.size):>12}  {stat.count:>7} blocks  {frame.filename}:{frame.lineno}")
+    return lines
+
+def _stats_section(stats, sort_key, title):
+    import io
+    buffer = io.StringIO()
+    stats.stream = buffer
+    stats.sort_stats(sort_key).print_stats(TOP_FUNCTIONS)
+    return [f"== Top functions by {title} ==", buffer.getvalue()]
+
+def build_report(name, stats, wall_seconds, peak_memory, final_snapshot):
+    """Assemble the text report from the CPU profile and memory measurements"""
+    lines = [
+        f"Profile report: {name}",
+        f"Generated: {datetime.now().isoformat(timespec='seconds')}",
+        f"Wall time: {wall_seconds:.3f}s",
+        f"CPU time (profiled): {stats.total_tt:.3f}s",
+        f"Peak traced memory: {_format_size(peak_memory)}",
+        "",
+        "== Stages ==",
+    ]
+
+    for stage_name, stage_stats in _stages.items():
+        lines.append(
+            f"{stage_name}: {stage_stats.calls} calls, {stage_stats.seconds:.3f}s wall, "
+            f"peak {_format_size(stage_stats.peak)} in a single call"
+        )
+    lines.append("")
+
+    lines.extend(_stats_section(stats, 'cumulative', 'cumulative time'))
+    lines.extend(_stats_section(stats, 'tottime', 'own time'))
+
+    for stage_name, stage_stats in _stages.items():
+        if stage_stats.snapshot is None:
+            continue
+        lines.append(f"== Memory in use (all code) when the heaviest '{stage_name}' call ended ==")
+        lines.extend(_top_allocations(stage_stats.snapshot))
+        lines.append("")
+
+    lines.append("== Allocation sites at end of run ==")
+    lines.extend(_top_allocations(final_snapshot))
+
+    return '\n'.join(lines) + '\n'
+
+def profile_run(name, func, *args, **kwargs):
+    """
+    Run func under cProfile and tracemalloc and write a report to logs/profiles/
+    Writes <name>_<timestamp>.txt (readable report) and .prof (raw pstats, e.g. for snakeviz)
+    Returns the path of the text report
+    """
+    global _active, _run_peak
+    # Only needed when actually profiling, so kept off the normal startup path
+    import cProfile
+    import pstats
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    base_path = os.path.join(PROFILE_DIR, f"{name}_{timestamp}")
+
+    _stages.clear()
+    _run_peak = 0
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    _active = True
+    profiler = cProfile.Profile()
+    wall_start = time.perf_counter()
+
+    try:
+        profiler.enable()
+        try:
+            func(*args, **kwargs)
+        finally:
+            profiler.disable()
+    finally:
+        wall_seconds = time.perf_counter() - wall_start
+        _active = False
+        peak_memory = max(_run_peak, tracemalloc.get_traced_memory()[1])
+        final_snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        profiler.dump_stats(f"{base_path}.prof")
+        stats = pstats.Stats(profiler)
+        with open(f"{base_path}.txt", 'w') as f:
+            f.write(build_report(name, stats, wall_seconds, peak_memory, final_snapshot))
+        _stages.clear()
+        logger.info(f"Saved profile report to {base_path}.txt")
+
+    return f"{base_path}.txt"
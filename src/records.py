@@ -0,0 +1,78 @@
+from typing import NamedTuple, Optional
+
+class WeatherRecord(NamedTuple):
+    """
+    One row of daily_weather
+    Field order matches the daily_weather column order used in the insert, so a record
+    is passed to cursor.execute() as the parameter tuple as-is.
+    Roughly half the memory of the equivalent dict (see benchmarks/record_layout.py).
+    """
+    city_id: Optional[int]
+    forecast_date: Optional[str]
+
+    # Temperature fields
+    temp: Optional[float]
+    max_temp: Optional[float]
+    min_temp: Optional[float]
+    apparent_max_temp: Optional[float]
+    apparent_min_temp: Optional[float]
+    high_temp: Optional[float]
+    low_temp: Optional[float]
+    dewpt: Optional[float]
+
+    # Precipitation
+    precipitation: Optional[float]
+    pop: Optional[int]
+    snow: Optional[float]
+    snow_depth: Optional[float]
+
+    # Wind
+    wind_speed: Optional[float]
+    wind_gust_spd: Optional[float]
+    wind_dir: Optional[int]
+    wind_cdir: Optional[str]
+    wind_cdir_full: Optional[str]
+
+    # Clouds and visibility
+    clouds: Optional[int]
+    clouds_hi: Optional[int]
+    clouds_low: Optional[int]
+    clouds_mid: Optional[int]
+    vis: Optional[float]
+
+    # Atmospheric
+    humidity: Optional[int]
+    pressure: Optional[float]
+    slp: Optional[float]
+    ozone: Optional[float]
+    uv: Optional[float]
+
+    # Weather description
+    weather_code: Optional[int]
+    weather_description: Optional[str]
+    weather_icon: Optional[str]
+
+    # Moon/sun
+    moon_phase: Optional[float]
+    moon_phase_lunation: Optional[float]
+    sunrise_ts: Optional[int]
+    sunset_ts: Optional[int]
+    moonrise_ts: Optional[int]
+    moonset_ts: Optional[int]
+
+    # Solar radiation
+    max_dhi: Optional[float]
+
+    # Derived fields
+    temp_range: Optional[float]
+    precip_category: Optional[str]
+
+    # Metadata
+    ts: Optional[int]
+
+# daily_weather columns written by the loader, in parameter order
+DAILY_WEATHER_COLUMNS = WeatherRecord._fields
+
+# Conflict key of daily_weather - every other column is updated on conflict
+CONFLICT_COLUMNS = ('city_id', 'forecast_date')
+UPDATE_COLUMNS = tuple(c for c in DAILY_WEATHER_COLUMNS if c not in CONFLICT_COLUMNS)
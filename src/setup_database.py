@@ -1,19 +1,13 @@
-import psycopg2
-from psycopg2 import sql
 import os
-from dotenv import load_dotenv
 import logging
-from logger_config import setup_logging
+import bootstrap
 
-# Load environment variables
-load_dotenv()
-
-# Configure logging
-setup_logging('setup.log')
+# .env and logging are set up by the entry point (bootstrap.initialise), not on import
 logger = logging.getLogger(__name__)
 
 def create_tables():
     """Create the database tables for weather data"""
+    import psycopg2
     
     # Connection params from environment variables
     conn_params = {
@@ -113,12 +107,68 @@ def create_tables():
                 -- Metadata
                 ts BIGINT,
                 created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
                 
                 UNIQUE(city_id, forecast_date)
             );
         """)
         logger.info("Created 'daily_weather' table")
-        
+
+        # updated_at - set on insert and whenever the upsert actually changes a row
+        # (ALTER covers databases created before the column existed)
+        cursor.execute("""
+            ALTER TABLE daily_weather
+            ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+        """)
+        # BRIN, not B-tree: updated_at changes on every real update, and a B-tree on it would make each of
+        # those a non-HOT update writing new entries into every index. Since Postgres 16 BRIN indexes don't
+        # prevent HOT updates, and a coarse index is enough for the export's updated_at range scans.
+        # (DROP replaces the B-tree created by earlier versions of this script.)
+        cursor.execute("DROP INDEX IF EXISTS idx_daily_weather_updated_at;")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_daily_weather_updated_at_brin
+            ON daily_weather USING brin (updated_at);
+        """)
+
+        # Create work_queue table (city leases for distributed mode)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS work_queue (
+                job_id SERIAL PRIMARY KEY,
+                city_name VARCHAR(100) NOT NULL,
+                latitude DECIMAL(10, 7) NOT NULL,
+                longitude DECIMAL(10, 7) NOT NULL,
+
+                -- Lease state: pending -> leased -> done
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                leased_by VARCHAR(100),
+                lease_expires_at TIMESTAMP WITH TIME ZONE,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                completed_at TIMESTAMP WITH TIME ZONE,
+
+                UNIQUE(latitude, longitude)
+            );
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_work_queue_status
+            ON work_queue (status, lease_expires_at);
+        """)
+        logger.info("Created 'work_queue' table")
+
+        # Create backfill_progress table (completed history chunks, so backfills can resume)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS backfill_progress (
+                latitude DECIMAL(10, 7) NOT NULL,
+                longitude DECIMAL(10, 7) NOT NULL,
+                chunk_start DATE NOT NULL,
+                chunk_end DATE NOT NULL,  -- Exclusive
+                rows_loaded INTEGER,
+                completed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+
+                PRIMARY KEY (latitude, longitude, chunk_start, chunk_end)
+            );
+        """)
+        logger.info("Created 'backfill_progress' table")
+
         # Commit changes
         conn.commit()
         logger.info("Database schema created successfully!")
@@ -134,4 +184,5 @@ def create_tables():
         logger.info("Database connection closed.")
 
 if __name__ == "__main__":
+    bootstrap.initialise('setup.log')
     create_tables()
\ No newline at end of file
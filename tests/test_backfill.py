@@ -0,0 +1,163 @@
+import unittest
+import sys
+import os
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+# Getting the absolute path to src directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+src_dir = os.path.join(parent_dir, 'src')
+
+# Add to path
+sys.path.insert(0, src_dir)
+
+import backfill
+from backfill import split_chunks, plan_chunks, chunk_is_complete, RateLimiter, run_backfill
+
+class TestChunks(unittest.TestCase):
+
+    def test_split_covers_range(self):
+        """Test that chunks cover the inclusive range exactly, end exclusive"""
+        chunks = split_chunks(date(2024, 1, 1), date(2024, 3, 15), 30)
+        self.assertEqual(chunks[0], (date(2024, 1, 1), date(2024, 1, 31)))
+        self.assertEqual(chunks[-1][1], date(2024, 3, 16))
+        for (_, previous_end), (next_start, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(previous_end, next_start)
+        self.assertEqual(sum((end - start).days for start, end in chunks), 75)
+
+    def test_single_day(self):
+        """Test a one-day range"""
+        self.assertEqual(split_chunks(date(2024, 1, 1), date(2024, 1, 1), 30),
+                         [(date(2024, 1, 1), date(2024, 1, 2))])
+
+    def test_plan_skips_completed(self):
+        """Test that completed chunks are not planned again"""
+        cities = [{'name': 'London', 'lat': 51.5074, 'lon': -0.1278},
+                  {'name': 'Tokyo', 'lat': 35.6762, 'lon': 139.6503}]
+        start, end = date(2024, 1, 1), date(2024, 2, 29)
+        all_jobs = plan_chunks(cities, start, end, 30, set())
+        self.assertEqual(len(all_jobs), 4)
+
+        completed = {(51.5074, -0.1278, date(2024, 1, 1), date(2024, 1, 31))}
+        remaining = plan_chunks(cities, start, end, 30, completed)
+        self.assertEqual(len(remaining), 3)
+        self.assertNotIn((cities[0], date(2024, 1, 1), date(2024, 1, 31)), remaining)
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_spaces_calls(self):
+        """Test that calls are spaced by 1/rate seconds"""
+        limiter = RateLimiter(20)
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    def test_disabled(self):
+        """Test that a rate of 0 means no waiting"""
+        limiter = RateLimiter(0)
+        start = time.monotonic()
+        for _ in range(100):
+            limiter.wait()
+        self.assertLess(time.monotonic() - start, 0.05)
+
+def history(start, end):
+    """A history response with one day for every date in [start, end)"""
+    return {'data': [{'datetime': (start + timedelta(days=i)).isoformat()} for i in range((end - start).days)]}
+
+class FakeCursor:
+    """Records executed statements; no chunks are recorded as completed"""
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self):
+        self.cursor_obj = FakeCursor()
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self.cursor_obj
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        pass
+
+class TestRunBackfill(unittest.TestCase):
+
+    def test_fetch_error_fails_only_its_chunk(self):
+        """Test that an unexpected error in a fetch thread counts as a failed chunk instead of ending the run"""
+        def fake_fetch(lat, lon, start_date, end_date):
+            if start_date == '2024-01-31':
+                raise ValueError("bad JSON")
+            return history(date.fromisoformat(start_date), date.fromisoformat(end_date))
+
+        def fake_load(cursor, city, api_response, counts, upsert_mode):
+            return 28  # e.g. two of 30 days failed validation
+
+        conn = FakeConnection()
+        cities = [{'name': 'London', 'lat': 51.5074, 'lon': -0.1278}]
+        with mock.patch.object(backfill, 'get_db_connection', return_value=conn), \
+             mock.patch.object(backfill, 'fetch_history_data', side_effect=fake_fetch), \
+             mock.patch.object(backfill, 'load_weather_response', side_effect=fake_load):
+            summary = run_backfill(cities, date(2024, 1, 1), date(2024, 3, 30), 30, 2, 0, 'changed')
+
+        self.assertEqual(summary['chunks_failed'], 1)
+        self.assertEqual(summary['chunks_done'], 2)
+
+        recorded = [params for sql, params in conn.cursor_obj.executed if 'INSERT INTO backfill_progress' in sql]
+        self.assertEqual(sorted(params[2] for params in recorded), [date(2024, 1, 1), date(2024, 3, 1)])
+        self.assertTrue(all(params[4] == 28 for params in recorded))
+
+    def test_incomplete_chunk_not_marked_done(self):
+        """Test that a chunk with missing days is loaded but left to be fetched again"""
+        def fake_fetch(lat, lon, start_date, end_date):
+            response = history(date.fromisoformat(start_date), date.fromisoformat(end_date))
+            if start_date == '2024-01-31':
+                response['data'] = response['data'][:10]
+            return response
+
+        conn = FakeConnection()
+        cities = [{'name': 'London', 'lat': 51.5074, 'lon': -0.1278}]
+        with mock.patch.object(backfill, 'get_db_connection', return_value=conn), \
+             mock.patch.object(backfill, 'fetch_history_data', side_effect=fake_fetch), \
+             mock.patch.object(backfill, 'load_weather_response', return_value=30) as load:
+            summary = run_backfill(cities, date(2024, 1, 1), date(2024, 3, 30), 30, 2, 0, 'changed')
+
+        self.assertEqual(load.call_count, 3)
+        self.assertEqual(summary['chunks_incomplete'], 1)
+        self.assertEqual(summary['chunks_done'], 2)
+        recorded = [params for sql, params in conn.cursor_obj.executed if 'INSERT INTO backfill_progress' in sql]
+        self.assertNotIn(date(2024, 1, 31), [params[2] for params in recorded])
+
+    def test_chunk_is_complete(self):
+        """Test that every date in the chunk must be present"""
+        start, end = date(2024, 1, 1), date(2024, 1, 31)
+        self.assertTrue(chunk_is_complete(history(start, end), start, end))
+        self.assertFalse(chunk_is_complete(history(start, end - timedelta(days=1)), start, end))
+        self.assertFalse(chunk_is_complete({'data': []}, start, end))
+
+    def test_end_must_be_before_today(self):
+        """Test that a range reaching today or later is rejected"""
+        with mock.patch.object(backfill, 'load_config', return_value={'cities': []}):
+            with self.assertRaises(SystemExit):
+                backfill.main(['--start', '2024-01-01', '--end', date.today().isoformat()])
+
+if __name__ == '__main__':
+    unittest.main()
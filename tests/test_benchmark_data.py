@@ -0,0 +1,92 @@
+import unittest
+import json
+import sys
+import os
+import urllib.error
+import urllib.request
+
+# Getting the absolute path to src and benchmarks directories
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+src_dir = os.path.join(parent_dir, 'src')
+benchmarks_dir = os.path.join(parent_dir, 'benchmarks')
+
+# Add to path
+sys.path.insert(0, src_dir)
+sys.path.insert(0, benchmarks_dir)
+
+from validate_data import validate_weather_record
+from data_generator import generate_cities, generate_payload, generate_records
+from fake_api import start_server
+from run_benchmarks import compare
+
+class TestDataGenerator(unittest.TestCase):
+
+    def test_generated_records_are_valid(self):
+        """Test that synthetic records pass validation without warnings"""
+        for _, day_data in generate_records(20, 16):
+            is_valid, warnings = validate_weather_record(day_data)
+            self.assertTrue(is_valid)
+            self.assertEqual(warnings, [])
+
+    def test_record_count(self):
+        """Test that N cities x D days records are generated"""
+        self.assertEqual(len(list(generate_records(7, 5))), 35)
+
+    def test_unique_coordinates(self):
+        """Test that every city gets its own coordinates"""
+        cities = generate_cities(1000)
+        self.assertEqual(len({(c['lat'], c['lon']) for c in cities}), 1000)
+
+    def test_payload_is_deterministic(self):
+        """Test that the same city and seed give the same payload"""
+        city = generate_cities(1)[0]
+        self.assertEqual(generate_payload(city, 3), generate_payload(city, 3))
+
+class TestFakeApi(unittest.TestCase):
+
+    def test_serves_forecast(self):
+        """Test that the fake API answers in the Weatherbit format"""
+        server = start_server(days=4)
+        try:
+            with urllib.request.urlopen(f"{server.url}/forecast/daily?lat=51.5&lon=-0.12") as response:
+                body = json.loads(response.read())
+        finally:
+            server.shutdown()
+        self.assertEqual(body['lat'], 51.5)
+        self.assertEqual(len(body['data']), 4)
+
+    def test_error_rate(self):
+        """Test that error_rate=1 makes every request fail"""
+        server = start_server(error_rate=1.0)
+        try:
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(f"{server.url}/forecast/daily?lat=1&lon=1")
+            context.exception.close()
+        finally:
+            server.shutdown()
+        self.assertEqual(context.exception.code, 500)
+
+class TestCompare(unittest.TestCase):
+
+    def results(self, **scenarios):
+        return {'timestamp': 'now', 'params': {}, 'scenarios': scenarios}
+
+    def test_compares_throughput_not_seconds(self):
+        """Test that a shorter run doing less work is not reported as faster"""
+        baseline = self.results(end_to_end={'seconds': 2.0, 'records': 800, 'records_per_second': 400.0})
+        # Half the rows loaded (e.g. fetch errors) in less time - lower throughput
+        current = self.results(end_to_end={'seconds': 1.5, 'records': 400, 'records_per_second': 266.7})
+        self.assertEqual(compare(current, baseline, 0.1), ['end_to_end'])
+
+        current = self.results(end_to_end={'seconds': 2.1, 'records': 800, 'records_per_second': 381.0})
+        self.assertEqual(compare(current, baseline, 0.1), [])
+
+    def test_failed_scenario_is_regression(self):
+        """Test that a scenario that loaded nothing is never ranked as faster"""
+        baseline = self.results(end_to_end={'seconds': 2.0, 'records': 800, 'records_per_second': 400.0})
+        current = self.results(end_to_end={'failed': 'no rows were loaded'})
+        self.assertEqual(compare(current, baseline, 0.1), ['end_to_end'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import importlib
+import logging
+import sys
+import os
+
+# Getting the absolute path to src directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+src_dir = os.path.join(parent_dir, 'src')
+
+# Add to path
+sys.path.insert(0, src_dir)
+
+import bootstrap
+import cli
+
+class TestImports(unittest.TestCase):
+
+    def test_pipeline_modules_import_without_side_effects(self):
+        """Test that importing the pipeline modules does not configure logging or run initialisation"""
+        root_handlers = list(logging.getLogger().handlers)
+
+        for name in ['extract', 'load_database', 'setup_database', 'distributed']:
+            sys.modules.pop(name, None)
+            importlib.import_module(name)
+
+        self.assertEqual(logging.getLogger().handlers, root_handlers)
+        self.assertFalse(bootstrap._initialised)
+
+class TestCli(unittest.TestCase):
+
+    def test_subcommands(self):
+        """Test that each subcommand maps to its handler"""
+        self.assertIs(cli.parse_args(['setup']).handler, cli.cmd_setup)
+        self.assertIs(cli.parse_args(['extract']).handler, cli.cmd_extract)
+        self.assertIs(cli.parse_args(['load', '--profile']).handler, cli.cmd_load)
+        self.assertTrue(cli.parse_args(['load', '--profile']).profile)
+
+    def test_distributed_passes_args_through(self):
+        """Test that options after `distributed` are left for distributed.py"""
+        args = cli.parse_args(['distributed', '--enqueue', '--workers', '4'])
+        self.assertEqual(args.passthrough_args, ['--enqueue', '--workers', '4'])
+
+    def test_backfill_passes_args_through(self):
+        """Test that options after `backfill` are left for backfill.py"""
+        args = cli.parse_args(['backfill', '--start', '2024-01-01', '--end', '2024-12-31'])
+        self.assertIs(args.handler, cli.cmd_backfill)
+        self.assertEqual(args.passthrough_args, ['--start', '2024-01-01', '--end', '2024-12-31'])
+
+    def test_help_reaches_module_parser(self):
+        """Test that --help after a pass-through command is left for the module's parser"""
+        for command in cli.PASSTHROUGH_COMMANDS:
+            args = cli.parse_args([command, '--help'])
+            self.assertEqual(args.passthrough_args, ['--help'])
+
+    def test_startup_time_before_command(self):
+        """Test that --startup-time is a CLI option placed before the command"""
+        args = cli.parse_args(['--startup-time', 'distributed', '--enqueue'])
+        self.assertTrue(args.startup_time)
+        self.assertEqual(args.passthrough_args, ['--enqueue'])
+
+    def test_command_required(self):
+        """Test that running without a subcommand is an error"""
+        with self.assertRaises(SystemExit):
+            cli.parse_args([])
+
+    def test_unknown_option_rejected(self):
+        """Test that stray options are only accepted for the distributed command"""
+        with self.assertRaises(SystemExit):
+            cli.parse_args(['load', '--workers', '4'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,268 @@
+import unittest
+import sys
+import os
+import multiprocessing
+import socket
+import tempfile
+from unittest import mock
+
+# Getting the absolute path to src directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+src_dir = os.path.join(parent_dir, 'src')
+
+# Add to path
+sys.path.insert(0, src_dir)
+
+import distributed
+import metrics
+from distributed import enqueue_cities, claim_batch, renew_lease, complete_job, release_job, run_worker
+
+CITIES = [
+    {'name': 'London', 'lat': 51.5074, 'lon': -0.1278},
+    {'name': 'Tokyo', 'lat': 35.6762, 'lon': 139.6503},
+    {'name': 'Sydney', 'lat': -33.8688, 'lon': 151.2093},
+]
+
+# Postgres tests run in their own schema so they never touch the real work_queue
+TEST_SCHEMA = 'test_distributed'
+
+class FakeCursor:
+    """Records executed statements and returns canned rowcount / fetchall() results"""
+    def __init__(self, rowcount=1, rows=None):
+        self.rowcount = rowcount
+        self.rows = rows or []
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+class TestQueueStatements(unittest.TestCase):
+
+    def test_claim_fails_exhausted_leases_first(self):
+        """Test that expired jobs on their last attempt are marked failed before claiming"""
+        cursor = FakeCursor(rowcount=0)
+        claim_batch(cursor, 'worker-1', 5, 300, 3)
+
+        fail_sql, fail_params = cursor.executed[0]
+        self.assertIn("status = 'failed'", fail_sql)
+        self.assertIn('lease_expires_at < CURRENT_TIMESTAMP', fail_sql)
+        self.assertIn('attempts >= %s', fail_sql)
+        self.assertEqual(fail_params, (3,))
+
+        claim_sql, claim_params = cursor.executed[1]
+        self.assertIn('FOR UPDATE SKIP LOCKED', claim_sql)
+        self.assertEqual(claim_params, ('worker-1', 300, 3, 5))
+
+    def test_claim_returns_cities(self):
+        """Test that claimed rows come back shaped like config.yaml cities"""
+        cursor = FakeCursor(rows=[(7, 'London', '51.5074000', '-0.1278000')])
+        batch = claim_batch(cursor, 'worker-1', 5, 300, 3)
+        self.assertEqual(batch, [{'job_id': 7, 'name': 'London', 'lat': 51.5074, 'lon': -0.1278}])
+
+    def test_lease_lost(self):
+        """Test that renew/complete report a lease taken over by another worker"""
+        self.assertTrue(renew_lease(FakeCursor(rowcount=1), 'worker-1', 7, 300))
+        self.assertFalse(renew_lease(FakeCursor(rowcount=0), 'worker-1', 7, 300))
+        self.assertTrue(complete_job(FakeCursor(rowcount=1), 'worker-1', 7))
+        self.assertFalse(complete_job(FakeCursor(rowcount=0), 'worker-1', 7))
+
+    def test_statements_check_lease_owner(self):
+        """Test that a worker can only renew, complete or release its own lease"""
+        cursor = FakeCursor()
+        renew_lease(cursor, 'worker-1', 7, 300)
+        complete_job(cursor, 'worker-1', 7)
+        release_job(cursor, 'worker-1', 7, 3)
+        for sql, params in cursor.executed:
+            self.assertIn('leased_by = %s', sql)
+            self.assertIn('worker-1', params)
+        self.assertEqual(cursor.executed[2][1], (3, 7, 'worker-1'))
+
+    def test_enqueue_resets_expired_leases(self):
+        """Test that enqueueing also brings back jobs whose lease expired"""
+        cursor = FakeCursor()
+        enqueue_cities(cursor, CITIES)
+        self.assertEqual(len(cursor.executed), len(CITIES))
+        sql, params = cursor.executed[0]
+        self.assertIn("work_queue.status = 'leased' AND work_queue.lease_expires_at < CURRENT_TIMESTAMP", sql)
+        self.assertEqual(params, ('London', 51.5074, -0.1278))
+
+class TestWorkerMetrics(unittest.TestCase):
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+
+    def test_failed_worker_writes_metrics_under_stable_name(self):
+        """Test that a worker whose run fails still writes metrics, named by host and slot rather than pid"""
+        with tempfile.TemporaryDirectory() as directory:
+            settings = {'enabled': True, 'file': os.path.join(directory, 'metrics.prom')}
+            with mock.patch.object(distributed, 'get_db_connection', side_effect=OSError("connection refused")):
+                run_worker(5, 300, 3, 'changed', settings, slot=2)
+            self.assertEqual(os.listdir(directory), [f"metrics_{socket.gethostname()}-2.prom"])
+
+def connect_test_db():
+    """Connect to the configured Postgres with the test schema on the search path, or return None"""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+        from load_database import get_db_connection
+        conn = get_db_connection()
+    except Exception:
+        return None
+    with conn.cursor() as cursor:
+        cursor.execute(f"SET search_path TO {TEST_SCHEMA}")
+    conn.commit()
+    return conn
+
+def drain_queue(worker_id, results):
+    """Worker process for the multi-process test: claim and complete jobs until none are left"""
+    conn = connect_test_db()
+    cursor = conn.cursor()
+    claimed = []
+    try:
+        while True:
+            batch = claim_batch(cursor, worker_id, 2, 60, 3)
+            conn.commit()
+            if not batch:
+                break
+            for city in batch:
+                if renew_lease(cursor, worker_id, city['job_id'], 60) and complete_job(cursor, worker_id, city['job_id']):
+                    claimed.append(city['job_id'])
+                conn.commit()
+    finally:
+        results.put(claimed)
+        cursor.close()
+        conn.close()
+
+class TestQueuePostgres(unittest.TestCase):
+    """Lease state changes against a real database - skipped unless Postgres is reachable (docker compose up -d)"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = connect_test_db()
+        if cls.conn is None:
+            raise unittest.SkipTest("Postgres not reachable")
+
+        with cls.conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('public.work_queue')")
+            if cursor.fetchone()[0] is None:
+                cls.conn.close()
+                raise unittest.SkipTest("work_queue table missing - run setup_database.py first")
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {TEST_SCHEMA}")
+            cursor.execute("CREATE TABLE IF NOT EXISTS work_queue (LIKE public.work_queue INCLUDING ALL)")
+        cls.conn.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {TEST_SCHEMA} CASCADE")
+        cls.conn.commit()
+        cls.conn.close()
+
+    def setUp(self):
+        self.cursor = self.conn.cursor()
+        self.cursor.execute("TRUNCATE work_queue")
+        enqueue_cities(self.cursor, CITIES)
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.rollback()
+        self.cursor.close()
+
+    def job(self, job_id):
+        self.cursor.execute("SELECT status, attempts, leased_by FROM work_queue WHERE job_id = %s", (job_id,))
+        return self.cursor.fetchone()
+
+    def expire(self, job_id):
+        self.cursor.execute("""
+            UPDATE work_queue SET lease_expires_at = CURRENT_TIMESTAMP - interval '1 second'
+            WHERE job_id = %s
+        """, (job_id,))
+        self.conn.commit()
+
+    def test_claim_and_complete(self):
+        """Test pending -> leased -> done, and that other workers can't complete the job"""
+        batch = claim_batch(self.cursor, 'worker-1', 2, 300, 3)
+        self.conn.commit()
+        self.assertEqual(sorted(city['name'] for city in batch), ['London', 'Tokyo'])
+        self.assertEqual(self.job(batch[0]['job_id']), ('leased', 1, 'worker-1'))
+
+        self.assertFalse(complete_job(self.cursor, 'worker-2', batch[0]['job_id']))
+        self.assertTrue(complete_job(self.cursor, 'worker-1', batch[0]['job_id']))
+        self.assertEqual(self.job(batch[0]['job_id']), ('done', 1, None))
+
+    def test_live_leases_not_claimed(self):
+        """Test that a second worker gets only the jobs nobody holds"""
+        claim_batch(self.cursor, 'worker-1', 2, 300, 3)
+        self.conn.commit()
+        batch = claim_batch(self.cursor, 'worker-2', 5, 300, 3)
+        self.assertEqual([city['name'] for city in batch], ['Sydney'])
+
+    def test_release_retries_until_failed(self):
+        """Test that a released job is retried and marked failed after max_attempts"""
+        job_id = claim_batch(self.cursor, 'worker-1', 1, 300, 2)[0]['job_id']
+        release_job(self.cursor, 'worker-1', job_id, 2)
+        self.assertEqual(self.job(job_id), ('pending', 1, None))
+
+        self.assertEqual(claim_batch(self.cursor, 'worker-1', 1, 300, 2)[0]['job_id'], job_id)
+        release_job(self.cursor, 'worker-1', job_id, 2)
+        self.assertEqual(self.job(job_id), ('failed', 2, None))
+
+    def test_expired_lease_reclaimed(self):
+        """Test that a dead worker's job is reclaimed and the old worker can no longer touch it"""
+        job_id = claim_batch(self.cursor, 'worker-1', 1, 300, 3)[0]['job_id']
+        self.expire(job_id)
+
+        self.assertEqual(claim_batch(self.cursor, 'worker-2', 1, 300, 3)[0]['job_id'], job_id)
+        self.assertEqual(self.job(job_id), ('leased', 2, 'worker-2'))
+        self.assertFalse(renew_lease(self.cursor, 'worker-1', job_id, 300))
+        self.assertFalse(complete_job(self.cursor, 'worker-1', job_id))
+
+    def test_expired_lease_on_last_attempt_fails(self):
+        """Test that a worker dying on the last attempt leaves the job failed, not leased forever"""
+        job_id = claim_batch(self.cursor, 'worker-1', 1, 300, 1)[0]['job_id']
+        self.expire(job_id)
+
+        batch = claim_batch(self.cursor, 'worker-2', 5, 300, 1)
+        self.assertNotIn(job_id, [city['job_id'] for city in batch])
+        self.assertEqual(self.job(job_id), ('failed', 1, None))
+
+    def test_enqueue_resets_expired_lease(self):
+        """Test that --enqueue brings back expired leases but leaves live ones alone"""
+        expired_id, live_id = [city['job_id'] for city in claim_batch(self.cursor, 'worker-1', 2, 300, 1)]
+        self.expire(expired_id)
+
+        enqueue_cities(self.cursor, CITIES)
+        self.assertEqual(self.job(expired_id), ('pending', 0, None))
+        self.assertEqual(self.job(live_id), ('leased', 1, 'worker-1'))
+
+    def test_concurrent_workers_claim_each_job_once(self):
+        """Test that several processes drain the queue with every job completed exactly once"""
+        self.cursor.execute("TRUNCATE work_queue")
+        enqueue_cities(self.cursor, [
+            {'name': f"City {i}", 'lat': i * 0.01, 'lon': i * 0.01} for i in range(40)
+        ])
+        self.conn.commit()
+
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=drain_queue, args=(f"worker-{i}", results))
+            for i in range(4)
+        ]
+        for process in processes:
+            process.start()
+        claimed = [job_id for _ in processes for job_id in results.get(timeout=60)]
+        for process in processes:
+            process.join()
+
+        self.assertEqual(len(claimed), 40)
+        self.assertEqual(len(set(claimed)), 40)
+        self.cursor.execute("SELECT count(*) FROM work_queue WHERE status = 'done'")
+        self.assertEqual(self.cursor.fetchone()[0], 40)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+import unittest
+import sys
+import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+# Getting the absolute path to src directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+src_dir = os.path.join(parent_dir, 'src')
+
+# Add to path
+sys.path.insert(0, src_dir)
+
+from export import (
+    partition_for, latest_row_indices, read_state, write_state, export_changes, compact_partition,
+    arrow_schema, _to_table
+)
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+# (name, PostgreSQL type OID) as in cursor.description - INTEGER, DATE, DECIMAL, DECIMAL, TIMESTAMPTZ
+DESCRIPTION = [('city_id', 23), ('forecast_date', 1082), ('temp', 1700), ('snow', 1700), ('updated_at', 1184)]
+COLUMNS = [name for name, _ in DESCRIPTION]
+CUTOFF = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+def row(city_id, day, temp, updated_at, snow=None):
+    """A daily_weather row as psycopg2 returns it - DECIMAL as Decimal, TIMESTAMPTZ tz-aware"""
+    return (city_id, date(2026, 3, 1) + timedelta(days=day), Decimal(temp),
+            None if snow is None else Decimal(snow), updated_at)
+
+class FakeCursor:
+    """Stands in for both the cutoff cursor and the named export cursor"""
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.executed = []
+        self.description = DESCRIPTION
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchone(self):
+        return (CUTOFF,)
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self, rows=()):
+        self.cutoff_cursor = FakeCursor([])
+        self.export_cursor = FakeCursor(rows)
+
+    def cursor(self, name=None):
+        return self.export_cursor if name else self.cutoff_cursor
+
+    def commit(self):
+        pass
+
+class TestExport(unittest.TestCase):
+
+    def test_partition_for(self):
+        """Test that rows are partitioned by forecast month"""
+        self.assertEqual(partition_for(date(2026, 3, 1)), 'forecast_month=2026-03')
+        self.assertEqual(partition_for(date(2026, 12, 31)), 'forecast_month=2026-12')
+
+    def test_latest_row_indices(self):
+        """Test that only the newest version of each key is kept"""
+        keys = [(1, '2026-03-01'), (1, '2026-03-02'), (1, '2026-03-01'), (2, '2026-03-01')]
+        versions = [10, 10, 20, 5]
+        self.assertEqual(latest_row_indices(keys, versions), [2, 1, 3])
+
+    def test_latest_row_indices_tie_keeps_later_row(self):
+        """Test that a later row wins when versions are equal"""
+        keys = [(1, '2026-03-01'), (1, '2026-03-01')]
+        self.assertEqual(latest_row_indices(keys, [10, 10]), [1])
+
+    def test_state_round_trip(self):
+        """Test that the high-water mark is persisted"""
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(read_state(directory), {})
+            write_state(directory, {'high_water_mark': '2026-03-01T00:00:00+00:00'})
+            self.assertEqual(read_state(directory)['high_water_mark'], '2026-03-01T00:00:00+00:00')
+
+    def test_export_changes_window(self):
+        """Test that rows are selected from the high-water mark up to the open-transaction cutoff"""
+        with tempfile.TemporaryDirectory() as directory:
+            write_state(directory, {'high_water_mark': '2026-03-09T00:00:00+00:00'})
+            conn = FakeConnection()
+            self.assertEqual(export_changes(conn, directory), 0)
+
+            cutoff_sql, _ = conn.cutoff_cursor.executed[0]
+            self.assertIn('pg_stat_activity', cutoff_sql)
+            self.assertIn('min(xact_start)', cutoff_sql)
+
+            export_sql, params = conn.export_cursor.executed[0]
+            self.assertIn('updated_at >= %s AND updated_at < %s', export_sql)
+            self.assertEqual(params, ('2026-03-09T00:00:00+00:00', CUTOFF))
+            self.assertEqual(read_state(directory)['high_water_mark'], CUTOFF.isoformat())
+
+@unittest.skipUnless(pyarrow, "pyarrow not installed")
+class TestParquet(unittest.TestCase):
+
+    def test_to_table_types(self):
+        """Test that DECIMAL becomes float64, even when all NULL, and timestamps are stored in UTC"""
+        table = _to_table(arrow_schema(DESCRIPTION), [row(1, 0, '20.50', CUTOFF)])
+        self.assertEqual(table.schema.field('forecast_date').type, pyarrow.date32())
+        self.assertEqual(table.schema.field('temp').type, pyarrow.float64())
+        self.assertEqual(table.schema.field('snow').type, pyarrow.float64())
+        self.assertEqual(table.schema.field('updated_at').type, pyarrow.timestamp('us', tz='UTC'))
+        self.assertEqual(table.column('temp').to_pylist(), [20.5])
+        self.assertEqual(table.column('snow').to_pylist(), [None])
+        self.assertEqual(table.column('updated_at').to_pylist()[0], CUTOFF)
+
+    def test_unknown_type_rejected(self):
+        """Test that a column type without a Parquet mapping is an error rather than a guess"""
+        with self.assertRaises(ValueError):
+            arrow_schema([('location', 600)])  # point
+
+    def test_all_null_batch_reads_with_others(self):
+        """Test that a file whose column is all NULL reads back together with files that have values"""
+        with tempfile.TemporaryDirectory() as directory:
+            export_changes(FakeConnection([row(1, 0, '20.00', CUTOFF - timedelta(days=2))]), directory)
+            export_changes(FakeConnection([row(1, 1, '21.00', CUTOFF - timedelta(days=1), snow='1.5')]), directory)
+
+            table = pq.read_table(directory)
+            self.assertEqual(table.num_rows, 2)
+            self.assertEqual(table.schema.field('snow').type, pyarrow.float64())
+            self.assertEqual(sorted(table.column('snow').to_pylist(), key=str), [1.5, None])
+
+    def test_export_compact_and_read_back(self):
+        """Test writing two exports to a partition, compacting it and reading the latest rows back"""
+        first = CUTOFF - timedelta(days=2)
+        second = CUTOFF - timedelta(days=1)
+
+        with tempfile.TemporaryDirectory() as directory:
+            exported = export_changes(FakeConnection([
+                row(1, 0, '20.00', first),
+                row(1, 1, '21.00', first),
+                row(2, 0, '15.00', first),
+                row(1, 31, '5.00', first),  # 2026-04-01 - next partition
+            ]), directory)
+            self.assertEqual(exported, 4)
+
+            # A later export with a changed row and a new one
+            export_changes(FakeConnection([
+                row(1, 0, '22.25', second),
+                row(2, 1, '16.00', second),
+            ]), directory)
+
+            march = os.path.join(directory, 'forecast_month=2026-03')
+            self.assertEqual(len([f for f in os.listdir(march) if f.endswith('.parquet')]), 2)
+            self.assertEqual(sorted(os.listdir(directory)),
+                             ['_export_state.json', 'forecast_month=2026-03', 'forecast_month=2026-04'])
+
+            compact_partition(march)
+            files = [f for f in os.listdir(march) if f.endswith('.parquet')]
+            self.assertEqual(len(files), 1)
+            self.assertTrue(files[0].startswith('compacted-'))
+
+            table = pq.read_table(os.path.join(march, files[0]))
+            self.assertEqual(table.schema.field('temp').type, pyarrow.float64())
+            rows = sorted(zip(*(table.column(name).to_pylist() for name in COLUMNS)))
+            self.assertEqual(rows, [
+                (1, date(2026, 3, 1), 22.25, None, second),
+                (1, date(2026, 3, 2), 21.0, None, first),
+                (2, date(2026, 3, 1), 15.0, None, first),
+                (2, date(2026, 3, 2), 16.0, None, second),
+            ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+
+# Getting the absolute path to src directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+src_dir = os.path.join(parent_dir, 'src')
+
+# Add to path
+sys.path.insert(0, src_dir)
+
+from load_database import (
+    insert_weather_record, get_upsert_mode, transform_weather_record, load_weather_response,
+    INSERT_WEATHER_SQL, INSERT_CHANGED_WEATHER_SQL
+)
+
+class FakeCursor:
+    """Records executed statements and returns a canned fetchone() result"""
+    def __init__(self, result):
+        self.result = result
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchone(self):
+        return self.result
+
+class TestUpsert(unittest.TestCase):
+
+    def setUp(self):
+        self.record = transform_weather_record({'datetime': '2026-03-01', 'temp': 20.0}, 1)
+
+    def test_outcomes(self):
+        """Test that the RETURNING result is turned into inserted/updated/unchanged"""
+        self.assertEqual(insert_weather_record(FakeCursor((True,)), self.record), 'inserted')
+        self.assertEqual(insert_weather_record(FakeCursor((False,)), self.record), 'updated')
+        self.assertEqual(insert_weather_record(FakeCursor(None), self.record), 'unchanged')
+
+    def test_record_passed_as_parameters(self):
+        """Test that the record itself is handed to execute()"""
+        cursor = FakeCursor((True,))
+        insert_weather_record(cursor, self.record)
+        self.assertIs(cursor.executed[0][1], self.record)
+
+    def test_mode_selects_statement(self):
+        """Test that only the 'changed' mode skips identical rows"""
+        cursor = FakeCursor((True,))
+        insert_weather_record(cursor, self.record, 'changed')
+        insert_weather_record(cursor, self.record, 'always')
+        self.assertEqual(cursor.executed[0][0], INSERT_CHANGED_WEATHER_SQL)
+        self.assertEqual(cursor.executed[1][0], INSERT_WEATHER_SQL)
+        self.assertIn('IS DISTINCT FROM', INSERT_CHANGED_WEATHER_SQL)
+        self.assertNotIn('IS DISTINCT FROM', INSERT_WEATHER_SQL)
+        self.assertIn('updated_at = CURRENT_TIMESTAMP', INSERT_WEATHER_SQL)
+
+    def test_get_upsert_mode(self):
+        """Test reading and validating load.upsert_mode"""
+        self.assertEqual(get_upsert_mode({}), 'changed')
+        self.assertEqual(get_upsert_mode({'load': {'upsert_mode': 'always'}}), 'always')
+        with self.assertRaises(ValueError):
+            get_upsert_mode({'load': {'upsert_mode': 'sometimes'}})
+
+class TestLoadWeatherResponse(unittest.TestCase):
+
+    def test_counts_only_loaded_rows(self):
+        """Test that days skipped by validation are not counted as loaded"""
+        cursor = FakeCursor((1,))  # city lookup finds city_id 1, then every upsert reports an insert
+        api_response = {'data': [
+            {'datetime': '2026-03-01', 'temp': 20.0},
+            {'temp': 21.0},  # No date - skipped
+            {'datetime': '2026-03-03', 'temp': 22.0},
+        ]}
+        city = {'name': 'London', 'lat': 51.5074, 'lon': -0.1278}
+        self.assertEqual(load_weather_response(cursor, city, api_response), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import json
+import logging
+import sys
+import os
+
+# Getting the absolute path to src directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+src_dir = os.path.join(parent_dir, 'src')
+
+# Add to path
+sys.path.insert(0, src_dir)
+
+from logger_config import RepeatFilter, JsonFormatter
+
+def make_record(msg, args=(), level=logging.WARNING, name='load_database'):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+class TestRepeatFilter(unittest.TestCase):
+
+    def test_burst_then_suppress(self):
+        """Test that only the first `burst` copies of a message pass within the window"""
+        repeat_filter = RepeatFilter(window_seconds=60, burst=3)
+        results = [
+            repeat_filter.filter(make_record("Data quality warnings for %s", (f"City {i}",)))
+            for i in range(10)
+        ]
+        self.assertEqual(results, [True] * 3 + [False] * 7)
+        self.assertEqual(repeat_filter.pending_summary(), [("Data quality warnings for %s", 7)])
+
+    def test_different_templates_counted_separately(self):
+        """Test that messages are grouped by their unformatted template"""
+        repeat_filter = RepeatFilter(window_seconds=60, burst=1)
+        self.assertTrue(repeat_filter.filter(make_record("Skipping record: %s", ("a",))))
+        self.assertTrue(repeat_filter.filter(make_record("Loaded %d days", (16,))))
+        self.assertFalse(repeat_filter.filter(make_record("Skipping record: %s", ("b",))))
+
+    def test_errors_never_suppressed(self):
+        """Test that error records always pass"""
+        repeat_filter = RepeatFilter(window_seconds=60, burst=1)
+        for _ in range(5):
+            self.assertTrue(repeat_filter.filter(make_record("Failed to fetch", level=logging.ERROR)))
+
+    def test_suppressed_count_reported_after_window(self):
+        """Test that the next record after the window carries the suppressed count"""
+        repeat_filter = RepeatFilter(window_seconds=0.0, burst=1)
+        repeat_filter._groups[('load_database', logging.WARNING, "Skipping record: %s")] = [0.0, 1, 4]
+        record = make_record("Skipping record: %s", ("x",))
+        self.assertTrue(repeat_filter.filter(record))
+        self.assertEqual(record.suppressed, 4)
+        self.assertIn("4 similar messages suppressed", record.getMessage())
+
+    def test_record_counted_once_across_handlers(self):
+        """Test that a record reaching several handlers is only counted once"""
+        repeat_filter = RepeatFilter(window_seconds=60, burst=1)
+        record = make_record("Skipping record: %s", ("x",))
+        self.assertTrue(repeat_filter.filter(record))
+        self.assertTrue(repeat_filter.filter(record))
+        self.assertFalse(repeat_filter.filter(make_record("Skipping record: %s", ("y",))))
+
+class TestJsonFormatter(unittest.TestCase):
+
+    def test_json_output(self):
+        """Test that records are formatted as one JSON object"""
+        record = make_record("Loaded %d days of weather data for %s", (16, "London"))
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry['message'], "Loaded 16 days of weather data for London")
+        self.assertEqual(entry['level'], "WARNING")
+        self.assertEqual(entry['logger'], "load_database")
+
+if __name__ == '__main__':
+    unittest.main()
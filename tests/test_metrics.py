@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+
+# Getting the absolute path to src directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+src_dir = os.path.join(parent_dir, 'src')
+
+# Add to path
+sys.path.insert(0, src_dir)
+
+import metrics
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        metrics.enable()
+        metrics.reset()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+
+    def test_disabled_records_nothing(self):
+        """Test that nothing is recorded while instrumentation is off"""
+        metrics.disable()
+        metrics.inc('rows_loaded')
+        with metrics.timer('fetch_seconds'):
+            pass
+        self.assertEqual(metrics.get_counter('rows_loaded'), 0)
+        self.assertIsNone(metrics.get_histogram('fetch_seconds'))
+
+    def test_counters_with_labels(self):
+        """Test that counters are kept separately per label set"""
+        metrics.inc('validation_warnings', rule='Invalid humidity')
+        metrics.inc('validation_warnings', rule='Invalid humidity')
+        metrics.inc('validation_warnings', rule='Invalid UV index')
+        self.assertEqual(metrics.get_counter('validation_warnings', rule='Invalid humidity'), 2)
+        self.assertEqual(metrics.get_counter('validation_warnings', rule='Invalid UV index'), 1)
+
+    def test_timer_observes_histogram(self):
+        """Test that timed blocks land in the histogram"""
+        with metrics.timer('upsert_seconds'):
+            pass
+        with metrics.timer('upsert_seconds'):
+            pass
+        histogram = metrics.get_histogram('upsert_seconds')
+        self.assertEqual(histogram.count, 2)
+        self.assertEqual(histogram.cumulative()[-1], 2)
+
+    def test_concurrent_updates(self):
+        """Test that counters and histograms updated from several threads lose nothing"""
+        def work():
+            for _ in range(2000):
+                metrics.inc('requests')
+                metrics.observe('fetch_seconds', 0.01)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(metrics.get_counter('requests'), 16000)
+        self.assertEqual(metrics.get_histogram('fetch_seconds').count, 16000)
+
+    def test_warning_rule(self):
+        """Test that warning messages are reduced to their rule name"""
+        self.assertEqual(metrics.warning_rule("Invalid humidity: 101% (must be 0-100)"), "Invalid humidity")
+        self.assertEqual(metrics.warning_rule("Temperature out of range: temp=150°C"), "Temperature out of range")
+        self.assertEqual(metrics.warning_rule("max_temp (10) < min_temp (20)"), "max_temp < min_temp")
+        self.assertEqual(metrics.warning_rule("Wind gust (5) < wind speed (10)"), "Wind gust < wind speed")
+
+    def test_render_prometheus(self):
+        """Test the Prometheus text output"""
+        metrics.inc('rows_loaded', 16)
+        metrics.inc('validation_warnings', rule='Invalid "UV" index')
+        metrics.observe('fetch_seconds', 0.2)
+        text = metrics.render_prometheus()
+        self.assertIn('# TYPE weather_etl_rows_loaded_total counter', text)
+        self.assertIn('weather_etl_rows_loaded_total 16', text)
+        self.assertIn('weather_etl_validation_warnings_total{rule="Invalid \\"UV\\" index"} 1', text)
+        self.assertIn('weather_etl_fetch_seconds_bucket{le="0.25"} 1', text)
+        self.assertIn('weather_etl_fetch_seconds_bucket{le="0.1"} 0', text)
+        self.assertIn('weather_etl_fetch_seconds_count 1', text)
+        self.assertIn('weather_etl_rows_per_second', text)
+
+    def test_start_follows_config(self):
+        """Test that start() only enables instrumentation when the config asks for it"""
+        metrics.disable()
+        self.assertFalse(metrics.start({}))
+        self.assertFalse(metrics.start({'enabled': False}))
+        self.assertTrue(metrics.start({'enabled': True}))
+
+    def test_finish_per_worker_file(self):
+        """Test that a worker's metrics go to their own file with a worker label"""
+        metrics.inc('rows_loaded', 3)
+        with tempfile.TemporaryDirectory() as directory:
+            metrics.finish({'file': os.path.join(directory, 'metrics.prom')}, worker='host-42')
+            self.assertEqual(os.listdir(directory), ['metrics_host-42.prom'])
+            with open(os.path.join(directory, 'metrics_host-42.prom')) as f:
+                text = f.read()
+        self.assertIn('weather_etl_rows_loaded_total{worker="host-42"} 3', text)
+        self.assertIn('weather_etl_run_seconds{worker="host-42"}', text)
+
+    def test_finish_disabled_writes_nothing(self):
+        """Test that finish() does nothing while instrumentation is off"""
+        metrics.disable()
+        with tempfile.TemporaryDirectory() as directory:
+            metrics.finish({'file': os.path.join(directory, 'metrics.prom')})
+            self.assertEqual(os.listdir(directory), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Getting the absolute path to src directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+src_dir = os.path.join(parent_dir, 'src')
+
+# Add to path
+sys.path.insert(0, src_dir)
+
+import profiling
+
+def fake_run():
+    for _ in range(3):
+        with profiling.stage('transform'):
+            [{'temp': i} for i in range(1000)]
+        with profiling.stage('load'):
+            pass
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.tmp_dir.cleanup()
+
+    def test_stage_is_noop_when_not_profiling(self):
+        """Test that stage() does nothing outside a profiled run"""
+        with profiling.stage('fetch'):
+            pass
+        self.assertEqual(profiling._stages, {})
+
+    def test_profile_run_writes_report(self):
+        """Test that a profiled run writes the text report and raw stats next to logs/"""
+        report_path = profiling.profile_run('test', fake_run)
+
+        self.assertTrue(report_path.startswith(os.path.join('logs', 'profiles', 'test_')))
+        self.assertTrue(os.path.exists(report_path))
+        self.assertTrue(os.path.exists(report_path.replace('.txt', '.prof')))
+
+        with open(report_path) as f:
+            report = f.read()
+        self.assertIn("transform: 3 calls", report)
+        self.assertIn("load: 3 calls", report)
+        self.assertIn("Top functions by cumulative time", report)
+        self.assertIn("Memory in use (all code) when the heaviest 'transform' call ended", report)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+
+# Getting the absolute path to src directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+src_dir = os.path.join(parent_dir, 'src')
+
+# Add to path
+sys.path.insert(0, src_dir)
+
+from load_database import transform_weather_record, INSERT_WEATHER_SQL
+from records import WeatherRecord, DAILY_WEATHER_COLUMNS, UPDATE_COLUMNS
+
+class TestWeatherRecord(unittest.TestCase):
+
+    def setUp(self):
+        self.day_data = {
+            'datetime': '2026-03-01',
+            'temp': 20.0,
+            'max_temp': 30.0,
+            'min_temp': 10.0,
+            'app_max_temp': 25.0,
+            'precip': 5.0,
+            'rh': 50,
+            'pres': 1000,
+            'wind_spd': 10,
+            'weather': {'code': 500, 'description': 'Light rain', 'icon': 'r01d'},
+            'ts': 1772323200
+        }
+
+    def test_transform_maps_api_fields(self):
+        """Test that API field names are mapped to the column names"""
+        record = transform_weather_record(self.day_data, 7)
+        self.assertIsInstance(record, WeatherRecord)
+        self.assertEqual(record.city_id, 7)
+        self.assertEqual(record.forecast_date, '2026-03-01')
+        self.assertEqual(record.apparent_max_temp, 25.0)
+        self.assertEqual(record.precipitation, 5.0)
+        self.assertEqual(record.humidity, 50)
+        self.assertEqual(record.pressure, 1000)
+        self.assertEqual(record.wind_speed, 10)
+        self.assertEqual(record.weather_code, 500)
+        self.assertEqual(record.weather_description, 'Light rain')
+        self.assertIsNone(record.snow)
+
+    def test_derived_fields(self):
+        """Test temperature range and precipitation category"""
+        record = transform_weather_record(self.day_data)
+        self.assertEqual(record.temp_range, 20.0)
+        self.assertEqual(record.precip_category, 'Moderate')
+
+        for precip, category in [(0, 'None'), (1, 'Light'), (12, 'Heavy')]:
+            self.day_data['precip'] = precip
+            self.assertEqual(transform_weather_record(self.day_data).precip_category, category)
+
+    def test_record_is_parameter_tuple(self):
+        """Test that a record lines up one-to-one with the insert placeholders"""
+        record = transform_weather_record(self.day_data, 1)
+        self.assertIsInstance(record, tuple)
+        self.assertEqual(len(record), len(DAILY_WEATHER_COLUMNS))
+        self.assertEqual(INSERT_WEATHER_SQL.count('%s'), len(record))
+
+    def test_conflict_key_not_updated(self):
+        """Test that the conflict key columns are not in the update list"""
+        self.assertNotIn('city_id', UPDATE_COLUMNS)
+        self.assertNotIn('forecast_date', UPDATE_COLUMNS)
+        self.assertEqual(len(UPDATE_COLUMNS), len(DAILY_WEATHER_COLUMNS) - 2)
+
+if __name__ == '__main__':
+    unittest.main()